@@ -1,120 +1,84 @@
 import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
-from jp_sub_speechrate.parsing import merge_intervals, parse_ass, parse_srt, strip_nonspoken
-from jp_sub_speechrate.reading import KanaReader
+from jp_sub_speechrate.api import (
+    ThreadReaders,
+    chunked_line_table,
+    file_cost,
+    map_largest_first,
+    parse_file,
+    summarize,
+)
+from jp_sub_speechrate.index import SHOW_ORDER, connect, query_drift, query_shows, settings, write_index
+from jp_sub_speechrate.journal import Journal, file_key
+from jp_sub_speechrate.lines import LineTable, iqr_mask
+from jp_sub_speechrate.memo import DEFAULT_MAXSIZE, set_memo_size
+from jp_sub_speechrate.progress import Progress
+from jp_sub_speechrate.reading import SPLIT_MODES, KanaReader
+from jp_sub_speechrate.watch import debounced_batches, open_watcher
 
 
-def _parse_items(path: Path):
-    if path.suffix.lower() == ".srt":
-        return parse_srt(str(path))
-    if path.suffix.lower() == ".ass":
-        return parse_ass(str(path))
-    return []
+def _stage(progress: Progress | None, name: str):
+    return progress.stage(name) if progress is not None else nullcontext()
 
 
-def _percentile(sorted_vals: list[float], p: float) -> float:
-    if not sorted_vals:
-        return 0.0
-    if p <= 0:
-        return sorted_vals[0]
-    if p >= 100:
-        return sorted_vals[-1]
-    k = (len(sorted_vals) - 1) * (p / 100.0)
-    f = int(k)
-    c = min(f + 1, len(sorted_vals) - 1)
-    if f == c:
-        return sorted_vals[f]
-    return sorted_vals[f] * (c - k) + sorted_vals[c] * (k - f)
-
-
-def _analyze_items(items, reader: KanaReader, unit: str, trim_outliers: bool):
-    entries = []
-    for start, end, text in items:
-        if not text.strip():
-            continue
-        text = strip_nonspoken(text)
-        if not text.strip():
-            continue
-        duration_ms = end - start
-        if duration_ms <= 0:
-            continue
-        strip_sokuon = unit == "kana"
-        reading = reader.to_kana(text, strip_sokuon=strip_sokuon)
-        if unit == "mora":
-            count = reader.count_mora(reading)
-        elif unit == "syllable":
-            count = reader.count_syllable(reading)
-        else:
-            count = reader.count_kana(reading)
-        if count <= 0:
-            continue
-        rate = count / (duration_ms / 1000.0 / 60.0)
-        entries.append((start, end, count, rate))
-
-    if trim_outliers and entries:
-        rates = sorted(e[3] for e in entries)
-        q1 = _percentile(rates, 25)
-        q3 = _percentile(rates, 75)
-        iqr = q3 - q1
-        if iqr > 0:
-            lower = q1 - 1.5 * iqr
-            upper = q3 + 1.5 * iqr
-            entries = [e for e in entries if lower <= e[3] <= upper]
-
-    if not entries:
-        return 0, 0.0, 0.0
-
-    total_units = sum(e[2] for e in entries)
-    intervals = [(e[0], e[1]) for e in entries]
-    merged = merge_intervals(intervals)
-    total_ms = sum(e - s for s, e in merged)
-    minutes = total_ms / 1000.0 / 60.0 if total_ms > 0 else 0.0
-    rate = (total_units / minutes) if minutes > 0 else 0.0
-    return total_units, minutes, rate
-
-
-def _line_rates(items, reader: KanaReader, unit: str) -> list[tuple[float, float]]:
-    entries = []
-    for start, end, text in items:
-        if not text.strip():
-            continue
-        text = strip_nonspoken(text)
-        if not text.strip():
-            continue
-        duration_ms = end - start
-        if duration_ms <= 0:
-            continue
-        strip_sokuon = unit == "kana"
-        reading = reader.to_kana(text, strip_sokuon=strip_sokuon)
-        if unit == "mora":
-            count = reader.count_mora(reading)
-        elif unit == "syllable":
-            count = reader.count_syllable(reading)
-        else:
-            count = reader.count_kana(reading)
-        if count <= 0:
-            continue
-        duration_s = duration_ms / 1000.0
-        rate = count / (duration_s / 60.0)
-        entries.append((rate, duration_s))
-    return entries
+def _file_lines(
+    fname: Path,
+    reader,
+    unit: str,
+    journal: Journal | None,
+    on_error: str,
+    progress: Progress | None = None,
+    chunk_pool: ThreadPoolExecutor | None = None,
+):
+    if progress is not None:
+        progress.start_file(fname)
+    key = file_key(fname) if journal is not None else None
+    if journal is not None:
+        lines = journal.get(key)
+        if lines is not None:
+            return lines
+    try:
+        with _stage(progress, "parse"):
+            items = parse_file(fname)
+        with _stage(progress, "analyze"):
+            lines = chunked_line_table(items, reader, unit, chunk_pool)
+    except Exception as exc:
+        if on_error == "abort":
+            raise
+        print(f"Skipping {fname}: {exc}", file=sys.stderr)
+        return None
+    if journal is not None:
+        journal.record(key, lines)
+    return lines
+
+
+def _episode_totals(lines: LineTable, trim_outliers: bool) -> tuple[int, float]:
+    return summarize(lines, trim_outliers, trim_min_lines=0)
 
 
-def _weighted_median(pairs: list[tuple[float, float]]) -> float:
-    if not pairs:
+def _weighted_median(values, weights, mask: bytearray | None = None) -> float:
+    order = [i for i in range(len(values)) if mask is None or mask[i]]
+    if not order:
         return 0.0
-    pairs = sorted(pairs, key=lambda x: x[0])
-    total_w = sum(w for _, w in pairs)
+    order.sort(key=values.__getitem__)
+    total_w = sum(weights[i] for i in order)
     if total_w <= 0:
         return 0.0
     target = total_w / 2.0
     acc = 0.0
-    for v, w in pairs:
-        acc += w
+    for i in order:
+        acc += weights[i]
         if acc >= target:
-            return v
-    return pairs[-1][0]
+            return values[i]
+    return values[order[-1]]
 
 
 def _collect_show_dirs(root: Path, exclude_subtitle_backup: bool) -> list[Path]:
@@ -131,7 +95,359 @@ def _collect_show_dirs(root: Path, exclude_subtitle_backup: bool) -> list[Path]:
     return sorted(dirs)
 
 
-def main():
+def _show_row(name: str, episodes: list[LineTable], trim_outliers: bool):
+    total_units = 0
+    total_minutes = 0.0
+    show_lines = LineTable()
+    for lines in episodes:
+        units, minutes = _episode_totals(lines, trim_outliers)
+        total_units += units
+        total_minutes += minutes
+        show_lines.extend(lines)
+    if total_minutes <= 0:
+        return None
+    rate = total_units / total_minutes
+    rates = show_lines.rates()
+    mask = iqr_mask(rates, min_count=4) if trim_outliers else None
+    line_median_tw = _weighted_median(rates, show_lines.durations(), mask)
+    return (name, total_units, total_minutes, rate, line_median_tw)
+
+
+def _index_shows(shows, trim_outliers: bool):
+    for show_path, name, episodes in shows:
+        row = _show_row(name, [lines for _, lines in episodes], trim_outliers)
+        if row is None:
+            continue
+        indexed = [(file, *_episode_totals(lines, trim_outliers), lines) for file, lines in episodes]
+        yield show_path, name, row[1:], indexed
+
+
+def _write_sqlite(path: str, unit: str, trim_outliers: bool, shows) -> None:
+    out = Path(path).expanduser()
+    write_index(out, {"unit": unit, "trim_outliers": trim_outliers}, _index_shows(shows, trim_outliers))
+    print(f"Wrote {out}", file=sys.stderr)
+
+
+def _print_table(rows, unit: str, file=None) -> None:
+    if not rows:
+        print("No valid subtitle entries found.", file=file)
+        return
+
+    unit_label = "MORA" if unit == "mora" else "SYLLABLE" if unit == "syllable" else "KANA"
+    print(f"| DIR | {unit_label} | MIN | RATE | LINE_MEDIAN_TW |", file=file)
+    print("| --- | --- | --- | --- | --- |", file=file)
+    for name, units, minutes, rate, line_median_tw in sorted(rows, key=lambda r: r[3]):
+        print(f"| {name} | {units} | {minutes:.2f} | {rate:.2f} | {line_median_tw:.2f} |", file=file)
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(v) for v in value.split("/", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 1 <= i <= N, got {value!r}")
+    return index, count
+
+
+def _open_partial(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def _write_partial(path: Path, header: dict, records) -> None:
+    # One JSON object per line: a header, then one record per episode with its raw
+    # (start, end, count) lines so that the merge can redo trimming and medians exactly.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _open_partial(path, "w") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def _read_partial(path: Path):
+    with _open_partial(path, "r") as f:
+        header = json.loads(f.readline())
+        records = [json.loads(line) for line in f if line.strip()]
+    return header, records
+
+
+def _partial_settings(header: dict) -> tuple:
+    return (
+        header["unit"],
+        header["trim_outliers"],
+        header["shard_count"],
+        header.get("dict"),
+        header.get("split_mode", "C"),
+    )
+
+
+def _merge_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="collect_show_rates.py merge",
+        description="Merge partial results written by --shard runs into the final per-show table.",
+    )
+    parser.add_argument("partials", nargs="+", help="Partial result files (.jsonl or .jsonl.gz)")
+    parser.add_argument("--sqlite", help="Also write a queryable SQLite index of the merged results")
+    args = parser.parse_args(argv)
+
+    header = None
+    seen_shards = set()
+    shows: dict[str, tuple[str, list[tuple[str, LineTable]]]] = {}
+    for partial in args.partials:
+        part_header, records = _read_partial(Path(partial).expanduser())
+        if header is None:
+            header = part_header
+        elif _partial_settings(part_header) != _partial_settings(header):
+            raise SystemExit(f"Partial {partial} was produced with different settings")
+        shard = part_header["shard_index"]
+        if shard in seen_shards:
+            raise SystemExit(f"Shard {shard}/{header['shard_count']} given more than once")
+        seen_shards.add(shard)
+        for record in records:
+            _, episodes = shows.setdefault(record["show"], (record["name"], []))
+            episodes.append((record["file"], LineTable.from_rows(record["lines"])))
+
+    missing = sorted(set(range(1, header["shard_count"] + 1)) - seen_shards)
+    if missing:
+        raise SystemExit(
+            "Missing shards: " + ", ".join(f"{i}/{header['shard_count']}" for i in missing)
+        )
+
+    rows = []
+    for key in sorted(shows):
+        name, episodes = shows[key]
+        episodes.sort(key=lambda e: e[0])
+        row = _show_row(name, [lines for _, lines in episodes], header["trim_outliers"])
+        if row is not None:
+            rows.append(row)
+    if args.sqlite:
+        merged = [(key, shows[key][0], shows[key][1]) for key in sorted(shows)]
+        _write_sqlite(args.sqlite, header["unit"], header["trim_outliers"], merged)
+    _print_table(rows, header["unit"])
+
+
+def _query_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="collect_show_rates.py query",
+        description="Rank and filter shows or episodes from a SQLite index written with --sqlite.",
+    )
+    parser.add_argument("db", help="SQLite index path")
+    parser.add_argument("--min-rate", type=float, help="Only shows with RATE >= this")
+    parser.add_argument("--max-rate", type=float, help="Only shows with RATE <= this")
+    parser.add_argument("--min-episodes", type=int, help="Only shows with at least this many episodes")
+    parser.add_argument("--min-minutes", type=float, help="Only shows with at least this many merged minutes")
+    parser.add_argument(
+        "--sort",
+        choices=sorted(SHOW_ORDER),
+        default="rate",
+        help="Sort shows by this column (default: rate)",
+    )
+    parser.add_argument("--desc", action="store_true", help="Sort in descending order")
+    parser.add_argument("--limit", type=int, help="Print at most this many rows")
+    parser.add_argument(
+        "--drift",
+        type=float,
+        metavar="PCT",
+        help="List episodes whose rate differs from their show's median episode rate by more than PCT percent",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        conn = connect(Path(args.db).expanduser())
+    except FileNotFoundError as exc:
+        raise SystemExit(str(exc))
+    try:
+        unit = settings(conn).get("unit", "mora")
+        if args.drift is not None:
+            rows = query_drift(conn, args.drift / 100.0, args.limit)
+            print("| DIR | FILE | RATE | SHOW_MEDIAN | DRIFT |")
+            print("| --- | --- | --- | --- | --- |")
+            for name, file, rate, median, drift in rows:
+                print(f"| {name} | {file} | {rate:.2f} | {median:.2f} | {drift * 100:+.1f}% |")
+            return
+        rows = query_shows(
+            conn,
+            min_rate=args.min_rate,
+            max_rate=args.max_rate,
+            min_episodes=args.min_episodes,
+            min_minutes=args.min_minutes,
+            order=args.sort,
+            descending=args.desc,
+            limit=args.limit,
+        )
+    finally:
+        conn.close()
+
+    unit_label = "MORA" if unit == "mora" else "SYLLABLE" if unit == "syllable" else "KANA"
+    print(f"| DIR | EPISODES | {unit_label} | MIN | RATE | LINE_MEDIAN_TW |")
+    print("| --- | --- | --- | --- | --- | --- |")
+    for name, episodes, units, minutes, rate, line_median_tw in rows:
+        print(f"| {name} | {episodes} | {units} | {minutes:.2f} | {rate:.2f} | {line_median_tw:.2f} |")
+
+
+def _watch_candidates(changed: set[Path], cached) -> set[Path]:
+    # Directories stand for everything below them: files that appeared and cached
+    # files that may have disappeared with them.
+    candidates = set()
+    for path in changed:
+        if path.suffix.lower() in (".srt", ".ass"):
+            candidates.add(path)
+        if path.is_dir():
+            candidates.update(p for p in path.rglob("*") if p.suffix.lower() in (".srt", ".ass") and p.is_file())
+        candidates.update(c for c in cached if path in c.parents)
+    return candidates
+
+
+def _watch_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="collect_show_rates.py watch",
+        description="Keep the per-show table up to date as subtitle files are added or changed under a root.",
+    )
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="Root directory to watch (default: current directory)",
+    )
+    parser.add_argument(
+        "--unit",
+        choices=["mora", "kana", "syllable"],
+        default="mora",
+        help="Rate unit to compute (default: mora)",
+    )
+    parser.add_argument(
+        "--include-outliers",
+        action="store_true",
+        help="Include per-line rate outliers (by default they are trimmed using IQR)",
+    )
+    parser.add_argument(
+        "--include-subtitle-backup",
+        action="store_true",
+        help="Include SubtitleBackup folders",
+    )
+    parser.add_argument(
+        "--out",
+        help="Rewrite the table to this file (atomically) on every update instead of printing it",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="Seconds without new file events before an update runs (default: 2)",
+    )
+    parser.add_argument(
+        "--max-latency",
+        type=float,
+        default=10.0,
+        help="Upper bound in seconds between the first event of a burst and its update (default: 10)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Rescan interval in seconds when inotify is unavailable (default: 5)",
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Force the polling watcher even where inotify is available",
+    )
+    parser.add_argument(
+        "--dict",
+        help="Sudachi dictionary: core, small, full, or a path to a system .dic (default: Sudachi's default)",
+    )
+    parser.add_argument(
+        "--split-mode",
+        choices=SPLIT_MODES,
+        default="C",
+        help="Sudachi split mode (default: C)",
+    )
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).expanduser().resolve()
+    exclude_backup = not args.include_subtitle_backup
+    trim_outliers = not args.include_outliers
+    reader = KanaReader(dict_type=args.dict, split_mode=args.split_mode)
+    files: dict[Path, tuple[str, LineTable]] = {}
+    rows: dict[Path, tuple] = {}
+
+    def refresh(paths) -> set[Path]:
+        touched = set()
+        for path in paths:
+            if exclude_backup and "SubtitleBackup" in path.parts:
+                continue
+            try:
+                key = file_key(path) if path.is_file() else None
+            except OSError:
+                # Removed (or replaced) between the event and the stat.
+                key = None
+            if key is not None:
+                cached = files.get(path)
+                if cached is not None and cached[0] == key:
+                    continue
+                lines = _file_lines(path, reader, args.unit, None, "skip")
+                if lines is None:
+                    files.pop(path, None)
+                else:
+                    files[path] = (key, lines)
+            elif files.pop(path, None) is None:
+                continue
+            touched.add(path.parent)
+        for d in touched:
+            episodes = [files[p][1] for p in sorted(files) if p.parent == d]
+            row = _show_row(d.name, episodes, trim_outliers) if episodes else None
+            if row is None:
+                rows.pop(d, None)
+            else:
+                rows[d] = row
+        return touched
+
+    def emit() -> None:
+        if args.out:
+            out = Path(args.out).expanduser()
+            tmp = out.with_name(out.name + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                _print_table(list(rows.values()), args.unit, file=f)
+            os.replace(tmp, out)
+        else:
+            _print_table(list(rows.values()), args.unit)
+            sys.stdout.flush()
+
+    watcher = open_watcher(root, args.poll_interval, force_polling=args.polling)
+    print(f"Watching {root} ({type(watcher).__name__})", file=sys.stderr)
+    try:
+        initial = [p for d in _collect_show_dirs(root, exclude_backup) for p in sorted(d.iterdir())]
+        refresh(p for p in initial if p.suffix.lower() in (".srt", ".ass"))
+        emit()
+        for batch in debounced_batches(watcher, args.debounce, args.max_latency):
+            started = time.monotonic()
+            touched = refresh(sorted(_watch_candidates(batch, list(files))))
+            if not touched:
+                continue
+            emit()
+            print(
+                f"Updated {len(touched)} show(s) in {time.monotonic() - started:.2f}s",
+                file=sys.stderr,
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "merge":
+        _merge_main(argv[1:])
+        return
+    if argv and argv[0] == "watch":
+        _watch_main(argv[1:])
+        return
+    if argv and argv[0] == "query":
+        _query_main(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Compute per-show mora/kana/syllable rates recursively under a root directory."
     )
@@ -156,53 +472,204 @@ def main():
         action="store_true",
         help="Include SubtitleBackup folders",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--shard",
+        type=_parse_shard,
+        metavar="i/N",
+        help="Process only the i-th of N deterministic slices of the show folders (1-based)",
+    )
+    parser.add_argument(
+        "--partial-out",
+        help="Write mergeable per-line partial results to this path (.jsonl or .jsonl.gz)",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Checkpoint completed files' per-line results to this journal file",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse results already in --journal instead of starting over",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=20,
+        help="Flush the journal to disk every N files (default: 20)",
+    )
+    parser.add_argument(
+        "--on-error",
+        choices=["abort", "skip"],
+        default="abort",
+        help="What to do when a subtitle file fails to parse or analyze (default: abort)",
+    )
+    parser.add_argument(
+        "--sqlite",
+        help="Also write shows, episodes and per-line stats to this SQLite index (see the query command)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Analyze files on N threads with per-thread tokenizers sharing one dictionary (default: 1)",
+    )
+    parser.add_argument(
+        "--dict",
+        help="Sudachi dictionary: core, small, full, or a path to a system .dic (default: Sudachi's default)",
+    )
+    parser.add_argument(
+        "--split-mode",
+        choices=SPLIT_MODES,
+        default="C",
+        help="Sudachi split mode (default: C)",
+    )
+    parser.add_argument(
+        "--reading-cache",
+        help="Share kana readings through this memory-mapped cache file (kept and reused across runs and processes)",
+    )
+    parser.add_argument(
+        "--reading-cache-size",
+        type=int,
+        default=64,
+        help="Size in MB of a newly created --reading-cache file (default: 64)",
+    )
+    parser.add_argument(
+        "--progress",
+        action=argparse.BooleanOptionalAction,
+        help="Show files/lines done, lines/s, ETA and the current file on stderr (default: when stderr is a terminal)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Keep Prometheus text-format run metrics in this file (e.g. for node-exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--text-memo-size",
+        type=int,
+        default=DEFAULT_MAXSIZE,
+        help=f"Distinct lines remembered per text normalization step; 0 disables (default: {DEFAULT_MAXSIZE})",
+    )
+    args = parser.parse_args(argv)
+    if args.shard and not args.partial_out:
+        parser.error("--shard requires --partial-out")
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
 
     root = Path(args.root).expanduser().resolve()
     show_dirs = _collect_show_dirs(root, not args.include_subtitle_backup)
-    if not show_dirs:
+    shard_index, shard_count = args.shard or (1, 1)
+    show_dirs = show_dirs[shard_index - 1 :: shard_count]
+    if not show_dirs and not args.partial_out:
         print("No subtitle folders found.")
         return
 
-    reader = KanaReader()
+    set_memo_size(args.text_memo_size)
+    cache = None
+    if args.reading_cache:
+        # Imported here: it needs fcntl, which Windows lacks.
+        from jp_sub_speechrate.reading_cache import ReadingCache, settings_key
+
+        try:
+            cache = ReadingCache(
+                Path(args.reading_cache).expanduser(),
+                args.reading_cache_size,
+                settings_key(args.dict, args.split_mode),
+            )
+        except (RuntimeError, ValueError) as exc:
+            raise SystemExit(str(exc))
+    if args.threads > 1:
+        reader = ThreadReaders(dict_type=args.dict, split_mode=args.split_mode, cache=cache)
+    else:
+        reader = KanaReader(dict_type=args.dict, split_mode=args.split_mode, cache=cache)
     trim_outliers = not args.include_outliers
+    # Only non-default tokenizer settings are recorded, so existing journals and partials
+    # stay compatible.
+    tokenizer_settings = {}
+    if args.dict:
+        tokenizer_settings["dict"] = args.dict
+    if args.split_mode != "C":
+        tokenizer_settings["split_mode"] = args.split_mode
+    journal = None
+    if args.journal:
+        try:
+            journal = Journal(
+                Path(args.journal).expanduser(),
+                {"unit": args.unit, **tokenizer_settings},
+                resume=args.resume,
+                checkpoint_every=args.checkpoint_every,
+            )
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+
+    show_files = [
+        (d, [f for f in sorted(d.iterdir()) if f.suffix.lower() in (".srt", ".ass")]) for d in show_dirs
+    ]
+    progress = Progress(
+        sum(len(fnames) for _, fnames in show_files),
+        "collect_show_rates",
+        show=args.progress,
+        metrics_path=Path(args.metrics_file).expanduser() if args.metrics_file else None,
+        cache=cache,
+    )
+    chunk_pool = ThreadPoolExecutor(max_workers=args.threads) if args.threads > 1 else None
+    results = map_largest_first(
+        lambda fname: _file_lines(fname, reader, args.unit, journal, args.on_error, progress, chunk_pool),
+        (fname for _, fnames in show_files for fname in fnames),
+        file_cost,
+        args.threads,
+    )
 
     rows = []
-    for d in show_dirs:
-        total_units = 0
-        total_minutes = 0.0
-        line_rates = []
-        for fname in sorted(d.iterdir()):
-            if fname.suffix.lower() not in (".srt", ".ass"):
-                continue
-            items = _parse_items(fname)
-            units, minutes, rate = _analyze_items(items, reader, args.unit, trim_outliers)
-            total_units += units
-            total_minutes += minutes
-            line_rates.extend(_line_rates(items, reader, args.unit))
-        if total_minutes > 0:
-            rate = total_units / total_minutes
-            if trim_outliers and len(line_rates) >= 4:
-                rates_only = sorted(r for r, _ in line_rates)
-                q1 = _percentile(rates_only, 25)
-                q3 = _percentile(rates_only, 75)
-                iqr = q3 - q1
-                if iqr > 0:
-                    lower = q1 - 1.5 * iqr
-                    upper = q3 + 1.5 * iqr
-                    line_rates = [(r, w) for r, w in line_rates if lower <= r <= upper]
-            line_median_tw = _weighted_median(line_rates)
-            rows.append((d.name, total_units, total_minutes, rate, line_median_tw))
+    shows = []
+    keep_episodes = bool(args.partial_out or args.sqlite)
+    try:
+        for d, fnames in show_files:
+            episodes = []
+            for fname in fnames:
+                lines = next(results)
+                progress.file_done(len(lines) if lines is not None else 0, error=lines is None)
+                if lines is None:
+                    continue
+                episodes.append((fname.name, lines))
+            with progress.stage("summarize"):
+                row = _show_row(d.name, [lines for _, lines in episodes], trim_outliers)
+            if row is not None:
+                rows.append(row)
+            if keep_episodes:
+                shows.append((d.relative_to(root).as_posix(), d.name, episodes))
+    finally:
+        results.close()
+        if chunk_pool is not None:
+            chunk_pool.shutdown(cancel_futures=True)
+        if journal is not None:
+            journal.close()
+        progress.close()
+        if cache is not None:
+            print(cache.stats(), file=sys.stderr)
+            cache.close()
 
-    if not rows:
-        print("No valid subtitle entries found.")
-        return
+    if args.partial_out:
+        header = {
+            "unit": args.unit,
+            "trim_outliers": trim_outliers,
+            "shard_index": shard_index,
+            "shard_count": shard_count,
+            **tokenizer_settings,
+        }
+        records = (
+            {"show": show_path, "name": name, "file": file, "lines": list(lines.rows())}
+            for show_path, name, episodes in shows
+            for file, lines in episodes
+        )
+        out = Path(args.partial_out).expanduser()
+        _write_partial(out, header, records)
+        print(f"Wrote {out}", file=sys.stderr)
+        if args.shard:
+            return
 
-    unit_label = "MORA" if args.unit == "mora" else "SYLLABLE" if args.unit == "syllable" else "KANA"
-    print(f"| DIR | {unit_label} | MIN | RATE | LINE_MEDIAN_TW |")
-    print("| --- | --- | --- | --- | --- |")
-    for name, units, minutes, rate, line_median_tw in sorted(rows, key=lambda r: r[3]):
-        print(f"| {name} | {units} | {minutes:.2f} | {rate:.2f} | {line_median_tw:.2f} |")
+    if args.sqlite:
+        _write_sqlite(args.sqlite, args.unit, trim_outliers, shows)
+
+    _print_table(rows, args.unit)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from jp_sub_speechrate.api import analyze_items, parse_file
+from jp_sub_speechrate.memo import clear_memos
+from jp_sub_speechrate.parsing import strip_nonspoken
+from jp_sub_speechrate.reading import SPLIT_MODES, KanaReader, load_dictionary
+
+
+def _collect_show_dirs(root: Path, exclude_subtitle_backup: bool) -> list[Path]:
+    exts = {".srt", ".ass"}
+    dirs = set()
+    for path in root.rglob("*"):
+        if not path.is_file():
+            continue
+        if path.suffix.lower() not in exts:
+            continue
+        if exclude_subtitle_backup and "SubtitleBackup" in path.parts:
+            continue
+        dirs.add(path.parent)
+    return sorted(dirs)
+
+
+def _parse_config(value: str) -> tuple[str, str]:
+    dict_type, _, split_mode = value.rpartition(":")
+    if not dict_type:
+        dict_type, split_mode = value, "C"
+    split_mode = split_mode.upper()
+    if split_mode not in SPLIT_MODES:
+        raise argparse.ArgumentTypeError(f"split mode must be one of {', '.join(SPLIT_MODES)}: {value}")
+    return dict_type, split_mode
+
+
+def _run_config(dict_type: str, split_mode: str, shows, unit: str, trim_outliers: bool) -> dict:
+    # Every configuration starts with cold normalization memos so the first one does not
+    # warm them up for the rest.
+    clear_memos()
+    t0 = time.perf_counter()
+    reader = KanaReader(load_dictionary(dict_type), split_mode=split_mode)
+    load_s = time.perf_counter() - t0
+
+    texts = [strip_nonspoken(text) for _, episodes in shows for _, items in episodes for _, _, text in items]
+    texts = [text for text in texts if text.strip()]
+    tokens = 0
+    t0 = time.perf_counter()
+    for text in texts:
+        tokens += len(reader.tokenize(text))
+    tokenize_s = time.perf_counter() - t0
+
+    rates = {}
+    lines = 0
+    t0 = time.perf_counter()
+    for name, episodes in shows:
+        units = 0
+        minutes = 0.0
+        for _, items in episodes:
+            # Episodes are trimmed without a minimum line count, as in collect_show_rates.py.
+            result = analyze_items(items, reader, unit, trim_outliers, trim_min_lines=0)
+            units += result.units
+            minutes += result.minutes
+            lines += len(result.lines)
+        rates[name] = units / minutes if minutes > 0 else 0.0
+    analyze_s = time.perf_counter() - t0
+
+    return {
+        "label": f"{dict_type}:{split_mode}",
+        "load_s": load_s,
+        "tokens_per_s": tokens / tokenize_s if tokenize_s > 0 else 0.0,
+        "lines_per_s": lines / analyze_s if analyze_s > 0 else 0.0,
+        "rates": rates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare Sudachi dictionaries and split modes: load time, throughput and per-show rate deltas."
+    )
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="Root directory to scan for subtitle folders (default: current directory)",
+    )
+    parser.add_argument(
+        "--config",
+        action="append",
+        type=_parse_config,
+        metavar="DICT[:MODE]",
+        help="Dictionary (core, small, full or a .dic path) and split mode, e.g. core:C or small:A; "
+        "repeat to compare, the first one is the baseline (default: core:C)",
+    )
+    parser.add_argument(
+        "--unit",
+        choices=["mora", "kana", "syllable"],
+        default="mora",
+        help="Rate unit to compute (default: mora)",
+    )
+    parser.add_argument(
+        "--include-outliers",
+        action="store_true",
+        help="Include per-line rate outliers (by default they are trimmed using IQR)",
+    )
+    parser.add_argument(
+        "--include-subtitle-backup",
+        action="store_true",
+        help="Include SubtitleBackup folders",
+    )
+    args = parser.parse_args()
+    configs = args.config or [("core", "C")]
+
+    root = Path(args.root).expanduser().resolve()
+    show_dirs = _collect_show_dirs(root, not args.include_subtitle_backup)
+    if not show_dirs:
+        print("No subtitle folders found.")
+        return
+
+    # Parse once up front so that only tokenization differs between configurations.
+    shows = []
+    for d in show_dirs:
+        files = [f for f in sorted(d.iterdir()) if f.suffix.lower() in (".srt", ".ass")]
+        name = d.relative_to(root).as_posix()
+        if name == ".":
+            name = d.name
+        shows.append((name, [(f, list(parse_file(f))) for f in files]))
+
+    results = []
+    for dict_type, split_mode in configs:
+        try:
+            results.append(_run_config(dict_type, split_mode, shows, args.unit, not args.include_outliers))
+        except Exception as exc:
+            print(f"Skipping {dict_type}:{split_mode}: {exc}", file=sys.stderr)
+
+    if not results:
+        return
+
+    print(f"{'CONFIG':<12}{'LOAD (s)':>10}{'TOKENS/s':>12}{'LINES/s':>10}")
+    for result in results:
+        print(
+            f"{result['label']:<12}{result['load_s']:>10.2f}{result['tokens_per_s']:>12.0f}"
+            f"{result['lines_per_s']:>10.0f}"
+        )
+
+    base = results[0]
+    print()
+    header = f"{'SHOW':<30}{base['label'] + ' ' + args.unit + '/min':>20}"
+    for result in results[1:]:
+        header += f"{result['label'] + ' delta':>18}"
+    print(header)
+    for name, base_rate in base["rates"].items():
+        row = f"{name:<30}{base_rate:>20.2f}"
+        for result in results[1:]:
+            rate = result["rates"][name]
+            pct = (rate - base_rate) / base_rate * 100.0 if base_rate > 0 else 0.0
+            row += f"{rate - base_rate:>+10.2f} ({pct:+.1f}%)"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import argparse
 import csv
+import gzip
+import io
+import sys
 from pathlib import Path
 
-from jp_sub_speechrate.parsing import parse_ass, parse_srt, strip_nonspoken
+from jp_sub_speechrate.api import ThreadReaders, file_cost, iter_lines, map_largest_first, parse_file
+from jp_sub_speechrate.progress import Progress
 from jp_sub_speechrate.reading import KanaReader
 
+HEADER = ["START", "END", "DURATION (s)", "{unit}", "RATE", "TEXT"]
+
 
 def _format_ms(ms: int) -> str:
     s, ms = divmod(ms, 1000)
@@ -13,74 +19,160 @@ def _format_ms(ms: int) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
 
 
-def _parse_items(path: Path):
-    if path.suffix.lower() == ".srt":
-        return parse_srt(str(path))
-    if path.suffix.lower() == ".ass":
-        return parse_ass(str(path))
-    return []
+def _header(unit: str) -> list[str]:
+    return [col.format(unit=unit.upper()) for col in HEADER]
+
+
+def _episode_csv(path: Path, reader, unit: str, prefix: list[str]) -> tuple[str, int]:
+    # The whole episode is rendered in memory and written with a single call.
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    rows = 0
+    for line in iter_lines(parse_file(path), reader, unit):
+        rows += 1
+        writer.writerow(
+            prefix
+            + [
+                _format_ms(line.start_ms),
+                _format_ms(line.end_ms),
+                f"{line.duration_s:.3f}",
+                line.units,
+                f"{line.rate:.2f}",
+                line.text.replace("\n", " / "),
+            ]
+        )
+    return buf.getvalue(), rows
+
+
+def _collect_files(root: Path, exclude_subtitle_backup: bool) -> list[Path]:
+    files = []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in (".srt", ".ass"):
+            continue
+        if exclude_subtitle_backup and "SubtitleBackup" in path.parts:
+            continue
+        files.append(path)
+    return files
+
+
+def _open_output(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return path.open("w", encoding="utf-8", newline="")
+
+
+def _bulk(args, src: Path, out: Path) -> None:
+    # A .csv or .csv.gz output gets every episode in one file with SHOW and EPISODE
+    # columns; anything else is a directory that mirrors the input tree, with one
+    # <episode file name>.csv per episode (ep01.srt -> ep01.srt.csv, so that ep01.srt
+    # and ep01.ass next to each other do not overwrite one another).
+    files = _collect_files(src, not args.include_subtitle_backup)
+    if not files:
+        raise SystemExit("No .srt or .ass files found.")
+    combined = out.name.endswith((".csv", ".csv.gz"))
+    # One reader per worker thread, all sharing a single loaded dictionary.
+    reader = ThreadReaders() if args.threads > 1 else KanaReader()
+    progress = Progress(len(files), "episode_to_csv", show=args.progress)
+
+    def export(path: Path):
+        progress.start_file(path)
+        show = path.parent.relative_to(src).as_posix()
+        if show == ".":
+            show = src.name
+        try:
+            text, rows = _episode_csv(path, reader, args.unit, [show, path.name] if combined else [])
+        except Exception as exc:
+            if args.on_error == "abort":
+                raise
+            print(f"Skipping {path}: {exc}", file=sys.stderr)
+            return None
+        if combined:
+            return text, rows
+        target = out / path.relative_to(src).parent / f"{path.name}.csv"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with target.open("w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(_header(args.unit))
+            f.write(text)
+        return "", rows
+
+    results = map_largest_first(export, files, file_cost, args.threads)
+    written = 0
+    f = None
+    try:
+        if combined:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            f = _open_output(out)
+            csv.writer(f).writerow(["SHOW", "EPISODE"] + _header(args.unit))
+        for result in results:
+            progress.file_done(result[1] if result is not None else 0, error=result is None)
+            if result is None:
+                continue
+            if f is not None:
+                f.write(result[0])
+            written += 1
+    finally:
+        if f is not None:
+            f.close()
+        progress.close()
+    print(f"Wrote {written} episodes to {out}")
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Export per-line subtitle rates for a single episode to CSV."
+        description="Export per-line subtitle rates for an episode, or in bulk for a show or library, to CSV."
+    )
+    parser.add_argument("input", help="Subtitle file (.srt or .ass), or a directory scanned recursively")
+    parser.add_argument(
+        "output",
+        help="Output CSV path; for a directory input, a .csv/.csv.gz file for one combined export "
+        "or a directory for one CSV per episode",
     )
-    parser.add_argument("input", help="Subtitle file (.srt or .ass)")
-    parser.add_argument("output", help="Output CSV path")
     parser.add_argument(
         "--unit",
         choices=["mora", "kana", "syllable"],
         default="mora",
         help="Rate unit to compute (default: mora)",
     )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Export episodes on N threads with per-thread tokenizers sharing one dictionary (default: 1)",
+    )
+    parser.add_argument(
+        "--on-error",
+        choices=["abort", "skip"],
+        default="abort",
+        help="What to do when a subtitle file fails to parse or analyze in bulk mode (default: abort)",
+    )
+    parser.add_argument(
+        "--include-subtitle-backup",
+        action="store_true",
+        help="Include SubtitleBackup folders in bulk mode",
+    )
+    parser.add_argument(
+        "--progress",
+        action=argparse.BooleanOptionalAction,
+        help="Show episodes/lines done, lines/s and ETA on stderr in bulk mode (default: when stderr is a terminal)",
+    )
     args = parser.parse_args()
 
     src = Path(args.input).expanduser().resolve()
     if not src.exists():
         raise SystemExit(f"Input not found: {src}")
+    out = Path(args.output).expanduser().resolve()
+    if src.is_dir():
+        _bulk(args, src, out)
+        return
     if src.suffix.lower() not in (".srt", ".ass"):
         raise SystemExit("Input must be .srt or .ass")
 
-    out = Path(args.output).expanduser().resolve()
     out.parent.mkdir(parents=True, exist_ok=True)
-
-    items = _parse_items(src)
     reader = KanaReader()
-
+    text, _ = _episode_csv(src, reader, args.unit, [])
     with out.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["START", "END", "DURATION (s)", args.unit.upper(), "RATE", "TEXT"])
-        for start, end, text in items:
-            if not text.strip():
-                continue
-            cleaned = strip_nonspoken(text)
-            if not cleaned.strip():
-                continue
-            duration_ms = end - start
-            if duration_ms <= 0:
-                continue
-            strip_sokuon = args.unit == "kana"
-            reading = reader.to_kana(cleaned, strip_sokuon=strip_sokuon)
-            if args.unit == "mora":
-                count = reader.count_mora(reading)
-            elif args.unit == "syllable":
-                count = reader.count_syllable(reading)
-            else:
-                count = reader.count_kana(reading)
-            if count <= 0:
-                continue
-            duration_s = duration_ms / 1000.0
-            rate = count / (duration_s / 60.0)
-            writer.writerow(
-                [
-                    _format_ms(start),
-                    _format_ms(end),
-                    f"{duration_s:.3f}",
-                    count,
-                    f"{rate:.2f}",
-                    cleaned.replace("\n", " / "),
-                ]
-            )
+        csv.writer(f).writerow(_header(args.unit))
+        f.write(text)
 
     print(f"Wrote {out}")
 
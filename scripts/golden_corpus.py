@@ -0,0 +1,278 @@
+import argparse
+import gzip
+import hashlib
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from jp_sub_speechrate.api import (
+    UNITS,
+    ThreadReaders,
+    file_cost,
+    iter_lines,
+    map_largest_first,
+    parse_file,
+    summarize,
+)
+from jp_sub_speechrate.lines import LineTable
+from jp_sub_speechrate.memo import clear_memos
+from jp_sub_speechrate.parsing import stream_subtitles
+from jp_sub_speechrate.reading import KanaReader
+
+SNAPSHOT_VERSION = 1
+
+
+def _collect_files(root: Path) -> list[Path]:
+    return sorted(p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in (".srt", ".ass"))
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _builtin_impl(name: str, threads: int, reading_cache: str | None):
+    # Returns analyze(path, unit) -> iterable of LineResult-like objects.
+    cache = None
+    if reading_cache:
+        from jp_sub_speechrate.reading_cache import ReadingCache, settings_key
+
+        try:
+            cache = ReadingCache(Path(reading_cache).expanduser(), settings=settings_key(None, "C"))
+        except (RuntimeError, ValueError) as exc:
+            raise SystemExit(str(exc))
+    reader = ThreadReaders(cache=cache) if threads > 1 else KanaReader(cache=cache)
+    if name == "default":
+        return lambda path, unit: iter_lines(parse_file(path), reader, unit)
+    if name == "stream":
+
+        def analyze(path: Path, unit: str):
+            with path.open("r", encoding="utf-8", errors="replace") as f:
+                return list(iter_lines(stream_subtitles(f), reader, unit))
+
+        return analyze
+    raise SystemExit(f"Unknown implementation: {name}")
+
+
+def _load_impl(spec: str, threads: int, reading_cache: str | None):
+    # "module:function" plugs in any alternative pipeline with the same signature.
+    if ":" not in spec:
+        return _builtin_impl(spec, threads, reading_cache)
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _file_record(root: Path, path: Path, analyze, units: list[str]) -> tuple[dict, int]:
+    record = {"file": path.relative_to(root).as_posix(), "sha256": _sha256(path), "units": {}}
+    line_count = 0
+    for unit in units:
+        rows = []
+        lines = LineTable()
+        for line in analyze(path, unit):
+            rows.append([line.start_ms, line.end_ms, line.text, line.reading, line.units])
+            lines.append(line.start_ms, line.end_ms, line.units)
+        totals = [list(summarize(lines, trim_outliers=True)), list(summarize(lines, trim_outliers=False))]
+        record["units"][unit] = {"lines": rows, "totals": totals}
+        line_count += len(rows)
+    return record, line_count
+
+
+def _run(root: Path, files: list[Path], analyze, units: list[str], threads: int) -> tuple[list[dict], int, float]:
+    # Every run starts with cold normalization memos so timings stay comparable.
+    clear_memos()
+    t0 = time.perf_counter()
+    records = []
+    line_count = 0
+    results = map_largest_first(lambda path: _file_record(root, path, analyze, units), files, file_cost, threads)
+    for record, count in results:
+        records.append(record)
+        line_count += count
+    return records, line_count, time.perf_counter() - t0
+
+
+def _write_snapshot(path: Path, header: dict, records: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def _read_snapshot(path: Path) -> tuple[dict, dict[str, dict]]:
+    if not path.exists():
+        raise SystemExit(f"Snapshot not found: {path}")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise SystemExit(f"Snapshot {path} has an unsupported version")
+        records = {}
+        for line in f:
+            record = json.loads(line)
+            records[record["file"]] = record
+    return header, records
+
+
+def _throughput(lines: int, elapsed: float) -> str:
+    rate = lines / elapsed if elapsed > 0 else 0.0
+    return f"{elapsed:.2f} s, {rate:.0f} lines/s"
+
+
+def _keyed(rows: list[list]) -> dict[tuple, list]:
+    # Lines are matched on (start, end, text) plus an occurrence number for exact repeats.
+    keyed = {}
+    seen: dict[tuple, int] = {}
+    for row in rows:
+        key = tuple(row[:3])
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        keyed[key + (n,)] = row
+    return keyed
+
+
+def _diff_unit(name: str, unit: str, expected: dict, actual: dict, max_examples: int) -> list[str]:
+    problems = []
+    exp_lines = _keyed(expected["lines"])
+    act_lines = _keyed(actual["lines"])
+    missing = [key for key in exp_lines if key not in act_lines]
+    extra = [key for key in act_lines if key not in exp_lines]
+    changed = [key for key in exp_lines if key in act_lines and exp_lines[key] != act_lines[key]]
+    for label, keys in (("missing", missing), ("extra", extra)):
+        if keys:
+            problems.append(f"{name} [{unit}]: {len(keys)} {label} lines")
+            for key in keys[:max_examples]:
+                problems.append(f"    {key[0]}-{key[1]} {key[2]!r}")
+    if changed:
+        problems.append(f"{name} [{unit}]: {len(changed)} lines with a different reading or count")
+        for key in changed[:max_examples]:
+            _, _, text, exp_reading, exp_units = exp_lines[key]
+            _, _, _, act_reading, act_units = act_lines[key]
+            problems.append(f"    {key[0]}-{key[1]} {text!r}: {exp_reading} ({exp_units}) -> {act_reading} ({act_units})")
+    if expected["totals"] != actual["totals"]:
+        problems.append(f"{name} [{unit}]: totals {expected['totals']} -> {actual['totals']}")
+    return problems
+
+
+def _add_impl_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--root", required=True, help="Frozen subtitle corpus directory (scanned recursively)")
+    parser.add_argument(
+        "--impl",
+        default="default",
+        help="Pipeline to run: default (parse_file + iter_lines), stream (stream_subtitles), or module:function "
+        "taking (path, unit) and returning LineResult-like objects (default: default)",
+    )
+    parser.add_argument("--threads", type=int, default=1, help="Run files on N threads (default: 1)")
+    parser.add_argument("--reading-cache", help="Use this reading cache file for the built-in implementations")
+
+
+def _record_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="golden_corpus.py record",
+        description="Run a frozen corpus through the pipeline and store per-line readings, counts and per-file totals.",
+    )
+    _add_impl_args(parser)
+    parser.add_argument("--out", required=True, help="Snapshot path (.jsonl.gz)")
+    parser.add_argument(
+        "--units",
+        default=",".join(UNITS),
+        help=f"Comma-separated units to record (default: {','.join(UNITS)})",
+    )
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).expanduser().resolve()
+    files = _collect_files(root)
+    if not files:
+        raise SystemExit("No .srt or .ass files found.")
+    units = [u for u in args.units.split(",") if u]
+    for unit in units:
+        if unit not in UNITS:
+            parser.error(f"unknown unit: {unit}")
+    analyze = _load_impl(args.impl, args.threads, args.reading_cache)
+    records, line_count, elapsed = _run(root, files, analyze, units, args.threads)
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "units": units,
+        "impl": args.impl,
+        "files": len(records),
+        "lines": line_count,
+        "elapsed": round(elapsed, 4),
+    }
+    out = Path(args.out).expanduser()
+    _write_snapshot(out, header, records)
+    print(f"Recorded {len(records)} files, {line_count} lines ({_throughput(line_count, elapsed)}) to {out}")
+
+
+def _diff_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="golden_corpus.py diff",
+        description="Run an implementation over the corpus and diff it against a recorded snapshot.",
+    )
+    _add_impl_args(parser)
+    parser.add_argument("--snapshot", required=True, help="Snapshot written by the record command")
+    parser.add_argument(
+        "--time-baseline",
+        action="store_true",
+        help="Also time the default implementation now instead of comparing with the recorded timing",
+    )
+    parser.add_argument(
+        "--max-examples",
+        type=int,
+        default=5,
+        help="Differing lines to show per file and unit (default: 5)",
+    )
+    args = parser.parse_args(argv)
+
+    header, expected = _read_snapshot(Path(args.snapshot).expanduser())
+    root = Path(args.root).expanduser().resolve()
+    files = _collect_files(root)
+    units = header["units"]
+    analyze = _load_impl(args.impl, args.threads, args.reading_cache)
+    records, line_count, elapsed = _run(root, files, analyze, units, args.threads)
+
+    problems = []
+    actual = {record["file"]: record for record in records}
+    for name in sorted(expected.keys() - actual.keys()):
+        problems.append(f"{name}: in the snapshot but not in the corpus")
+    for name in sorted(actual.keys() - expected.keys()):
+        problems.append(f"{name}: in the corpus but not in the snapshot")
+    for name in sorted(expected.keys() & actual.keys()):
+        exp, act = expected[name], actual[name]
+        if exp["sha256"] != act["sha256"]:
+            problems.append(f"{name}: file content changed since the snapshot was recorded")
+            continue
+        for unit in units:
+            problems.extend(_diff_unit(name, unit, exp["units"][unit], act["units"][unit], args.max_examples))
+
+    for problem in problems:
+        print(problem)
+    print()
+    if args.time_baseline:
+        baseline = _load_impl("default", 1, None)
+        _, base_lines, base_elapsed = _run(root, files, baseline, units, 1)
+        base_label = "default (now)"
+    else:
+        base_lines, base_elapsed = header["lines"], header["elapsed"]
+        base_label = f"{header['impl']} (recorded)"
+    print(f"{'baseline':<10}{base_label:<24}{_throughput(base_lines, base_elapsed)}")
+    print(f"{'candidate':<10}{args.impl:<24}{_throughput(line_count, elapsed)}")
+    if elapsed > 0 and base_elapsed > 0:
+        print(f"speedup   {base_elapsed / elapsed:.2f}x")
+    if problems:
+        print(f"DIFFERENT: {len(problems)} problems")
+        sys.exit(1)
+    print(f"IDENTICAL: {len(actual)} files, {line_count} lines")
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "record":
+        _record_main(argv[1:])
+        return
+    if argv and argv[0] == "diff":
+        _diff_main(argv[1:])
+        return
+    raise SystemExit("usage: golden_corpus.py {record,diff} --root CORPUS ...")
+
+
+if __name__ == "__main__":
+    main()
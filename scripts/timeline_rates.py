@@ -0,0 +1,124 @@
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+from jp_sub_speechrate.api import line_table, parse_file
+from jp_sub_speechrate.lines import iqr_mask
+from jp_sub_speechrate.reading import KanaReader
+from jp_sub_speechrate.timeline import rate_timeline
+
+
+def _format_ms(ms: int) -> str:
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def _collect_files(path: Path) -> list[Path]:
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in (".srt", ".ass"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export a time-resolved speech-rate timeline (per window) for each episode."
+    )
+    parser.add_argument("input", help="Subtitle file or directory (scanned recursively)")
+    parser.add_argument(
+        "--out",
+        default="-",
+        help="Output path (default: stdout)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        default="csv",
+        help="Output format (default: csv)",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=60.0,
+        help="Window length in seconds (default: 60)",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        help="Window step in seconds; smaller than --window gives sliding windows (default: --window)",
+    )
+    parser.add_argument(
+        "--unit",
+        choices=["mora", "kana", "syllable"],
+        default="mora",
+        help="Rate unit to compute (default: mora)",
+    )
+    parser.add_argument(
+        "--trim-outliers",
+        action="store_true",
+        help="Drop per-line rate outliers (IQR) before building the timeline",
+    )
+    args = parser.parse_args()
+
+    src = Path(args.input).expanduser().resolve()
+    if not src.exists():
+        raise SystemExit(f"Input not found: {src}")
+    files = _collect_files(src)
+    if not files:
+        raise SystemExit("No .srt or .ass files found.")
+
+    window_ms = int(args.window * 1000)
+    step_ms = int(args.step * 1000) if args.step else window_ms
+    if window_ms <= 0 or step_ms <= 0:
+        raise SystemExit("--window and --step must be positive")
+
+    reader = KanaReader()
+    if args.out == "-":
+        out = sys.stdout
+    else:
+        out_path = Path(args.out).expanduser().resolve()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out = out_path.open("w", encoding="utf-8", newline="")
+
+    try:
+        writer = None
+        if args.format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(["FILE", "START", "END", "SPEECH (s)", args.unit.upper(), "RATE"])
+        for path in files:
+            name = path.relative_to(src).as_posix() if src.is_dir() else path.name
+            lines = line_table(parse_file(path), reader, args.unit)
+            mask = iqr_mask(lines.rates()) if args.trim_outliers else None
+            for win_start, win_end, units, speech_ms, rate in rate_timeline(lines, window_ms, step_ms, mask):
+                if writer is not None:
+                    writer.writerow(
+                        [
+                            name,
+                            _format_ms(win_start),
+                            _format_ms(win_end),
+                            f"{speech_ms / 1000.0:.3f}",
+                            f"{units:.2f}",
+                            f"{rate:.2f}",
+                        ]
+                    )
+                else:
+                    record = {
+                        "file": name,
+                        "start_ms": win_start,
+                        "end_ms": win_end,
+                        "speech_ms": speech_ms,
+                        "units": round(units, 4),
+                        "rate": round(rate, 4),
+                    }
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+            print(f"Wrote {out_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,18 @@
 import argparse
+import html
+import math
+import sys
+from array import array
+from itertools import compress
 from pathlib import Path
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-from jp_sub_speechrate.parsing import merge_intervals, parse_ass, parse_srt, strip_nonspoken
+from jp_sub_speechrate.api import line_table, parse_file, summarize
+from jp_sub_speechrate.journal import Journal, file_key
+from jp_sub_speechrate.lines import LineTable, iqr_mask
+from jp_sub_speechrate.progress import Progress
 from jp_sub_speechrate.reading import KanaReader
 
 
-def _parse_items(path: Path):
-    if path.suffix.lower() == ".srt":
-        return parse_srt(str(path))
-    if path.suffix.lower() == ".ass":
-        return parse_ass(str(path))
-    return []
-
-
-def _percentile(sorted_vals: list[float], p: float) -> float:
-    if not sorted_vals:
-        return 0.0
-    if p <= 0:
-        return sorted_vals[0]
-    if p >= 100:
-        return sorted_vals[-1]
-    k = (len(sorted_vals) - 1) * (p / 100.0)
-    f = int(k)
-    c = min(f + 1, len(sorted_vals) - 1)
-    if f == c:
-        return sorted_vals[f]
-    return sorted_vals[f] * (c - k) + sorted_vals[c] * (k - f)
-
-
-def _trim_iqr(values: list[float]) -> set[float]:
-    if len(values) < 4:
-        return set(values)
-    sorted_vals = sorted(values)
-    q1 = _percentile(sorted_vals, 25)
-    q3 = _percentile(sorted_vals, 75)
-    iqr = q3 - q1
-    if iqr <= 0:
-        return set(values)
-    lower = q1 - 1.5 * iqr
-    upper = q3 + 1.5 * iqr
-    return {v for v in values if lower <= v <= upper}
-
-
 def _weighted_mean(values: list[float], weights: list[float] | None) -> float:
     if not values:
         return 0.0
@@ -80,16 +46,18 @@ def _weighted_median(values: list[float], weights: list[float] | None) -> float:
     return pairs[-1][0]
 
 
-def _histogram_mode(values: list[float], weights: list[float] | None, bins: int) -> float:
+def _histogram(values: list[float], weights: list[float] | None, bins: int) -> tuple[float, float, list[float]]:
+    # Equal-width bins over [min, max]: (first edge, bin width, per-bin counts or weights).
+    # A width of 0 means all values are equal (or there are none).
     if not values:
-        return 0.0
+        return 0.0, 0.0, []
     vmin = min(values)
     vmax = max(values)
     if vmin == vmax:
-        return vmin
+        return vmin, 0.0, [float(sum(weights)) if weights else float(len(values))]
     width = (vmax - vmin) / bins
     if width <= 0:
-        return vmin
+        return vmin, 0.0, [float(sum(weights)) if weights else float(len(values))]
     counts = [0.0] * bins
     if weights:
         for v, w in zip(values, weights):
@@ -103,62 +71,146 @@ def _histogram_mode(values: list[float], weights: list[float] | None, bins: int)
             if idx >= bins:
                 idx = bins - 1
             counts[idx] += 1.0
-    max_idx = max(range(bins), key=lambda i: counts[i])
+    return vmin, width, counts
+
+
+def _histogram_mode(hist: tuple[float, float, list[float]]) -> float:
+    vmin, width, counts = hist
+    if width <= 0:
+        return vmin
+    max_idx = max(range(len(counts)), key=lambda i: counts[i])
     return vmin + (max_idx + 0.5) * width
 
 
-def _line_entries(items, reader: KanaReader, unit: str) -> list[tuple[int, int, int, float, float]]:
-    entries = []
-    for start, end, text in items:
-        if not text.strip():
-            continue
-        text = strip_nonspoken(text)
-        if not text.strip():
-            continue
-        duration_ms = end - start
-        if duration_ms <= 0:
-            continue
-        strip_sokuon = unit == "kana"
-        reading = reader.to_kana(text, strip_sokuon=strip_sokuon)
-        if unit == "mora":
-            count = reader.count_mora(reading)
-        elif unit == "syllable":
-            count = reader.count_syllable(reading)
-        else:
-            count = reader.count_kana(reading)
-        if count <= 0:
-            continue
-        rate = count / (duration_ms / 1000.0 / 60.0)
-        entries.append((start, end, count, rate, duration_ms / 1000.0))
-    return entries
+def _nice_ticks(lo: float, hi: float, target: int = 6) -> list[float]:
+    if hi <= lo:
+        return [lo]
+    raw = (hi - lo) / target
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    first = math.ceil(lo / step) * step
+    return [first + i * step for i in range(int((hi - first) / step + 1e-9) + 1)]
 
 
-def _episode_rate(items, reader: KanaReader, unit: str, trim_outliers: bool) -> float:
-    entries = _line_entries(items, reader, unit)
-    if not entries:
-        return 0.0
+def _tick_label(value: float) -> str:
+    return f"{value:g}" if abs(value) < 1e6 else f"{value:.2e}"
 
-    if trim_outliers:
-        rates = sorted(e[3] for e in entries)
-        q1 = _percentile(rates, 25)
-        q3 = _percentile(rates, 75)
-        iqr = q3 - q1
-        if iqr > 0:
-            lower = q1 - 1.5 * iqr
-            upper = q3 + 1.5 * iqr
-            entries = [e for e in entries if lower <= e[3] <= upper]
-    if not entries:
-        return 0.0
 
-    total = sum(e[2] for e in entries)
-    merged = merge_intervals([(e[0], e[1]) for e in entries])
-    total_ms = sum(e - s for s, e in merged)
-    minutes = total_ms / 1000.0 / 60.0 if total_ms > 0 else 0.0
-    return (total / minutes) if minutes > 0 else 0.0
+SVG_WIDTH = 800
+SVG_HEIGHT = 400
+_MARGIN = (70, 20, 40, 55)  # left, right, top, bottom
+_LINE_COLORS = ("red", "#ff7f0e", "#2ca02c")
+
+
+def _render_svg(
+    hist: tuple[float, float, list[float]],
+    markers: list[tuple[str, float]],
+    title: str,
+    xlabel: str,
+    ylabel: str,
+) -> str:
+    # A self-contained histogram: bars from the precomputed bins, dashed marker lines
+    # with a legend, and axes with rounded tick values. Only stdlib string formatting.
+    vmin, width, counts = hist
+    if width > 0:
+        x_lo, x_hi = vmin, vmin + width * len(counts)
+    else:
+        x_lo, x_hi = vmin - 0.5, vmin + 0.5
+    y_hi = max(counts) * 1.05 if counts and max(counts) > 0 else 1.0
+    left, right, top, bottom = _MARGIN
+    plot_w = SVG_WIDTH - left - right
+    plot_h = SVG_HEIGHT - top - bottom
+
+    def sx(x: float) -> float:
+        return left + (x - x_lo) / (x_hi - x_lo) * plot_w
+
+    def sy(y: float) -> float:
+        return top + plot_h - y / y_hi * plot_h
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{SVG_HEIGHT}" '
+        f'viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" font-family="sans-serif" font-size="12">',
+        f'<rect width="{SVG_WIDTH}" height="{SVG_HEIGHT}" fill="white"/>',
+        f'<text x="{left + plot_w / 2:.1f}" y="{top - 8}" text-anchor="middle" font-size="14">'
+        f"{html.escape(title)}</text>",
+    ]
+    bars = []
+    if width > 0:
+        for i, count in enumerate(counts):
+            if count <= 0:
+                continue
+            x0 = sx(vmin + i * width)
+            x1 = sx(vmin + (i + 1) * width)
+            bars.append(f'<rect x="{x0:.1f}" y="{sy(count):.1f}" width="{x1 - x0:.1f}" height="{sy(0) - sy(count):.1f}"/>')
+    elif counts:
+        bars.append(
+            f'<rect x="{sx(vmin - 0.5):.1f}" y="{sy(counts[0]):.1f}" width="{plot_w:.1f}" '
+            f'height="{sy(0) - sy(counts[0]):.1f}"/>'
+        )
+    out.append('<g fill="#1f77b4">' + "".join(bars) + "</g>")
+
+    axis = [f'<path d="M{left},{top}V{top + plot_h}H{left + plot_w}" fill="none" stroke="black"/>']
+    for tick in _nice_ticks(x_lo, x_hi):
+        x = sx(tick)
+        axis.append(f'<line x1="{x:.1f}" y1="{top + plot_h}" x2="{x:.1f}" y2="{top + plot_h + 5}" stroke="black"/>')
+        axis.append(f'<text x="{x:.1f}" y="{top + plot_h + 18}" text-anchor="middle">{_tick_label(tick)}</text>')
+    for tick in _nice_ticks(0.0, y_hi):
+        y = sy(tick)
+        axis.append(f'<line x1="{left - 5}" y1="{y:.1f}" x2="{left}" y2="{y:.1f}" stroke="black"/>')
+        axis.append(f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end">{_tick_label(tick)}</text>')
+    axis.append(
+        f'<text x="{left + plot_w / 2:.1f}" y="{SVG_HEIGHT - 12}" text-anchor="middle">{html.escape(xlabel)}</text>'
+    )
+    axis.append(
+        f'<text transform="translate(16 {top + plot_h / 2:.1f}) rotate(-90)" text-anchor="middle">'
+        f"{html.escape(ylabel)}</text>"
+    )
+    out.extend(axis)
+
+    legend_y = top + 14
+    for (label, value), color in zip(markers, _LINE_COLORS):
+        x = sx(value)
+        out.append(
+            f'<line x1="{x:.1f}" y1="{top}" x2="{x:.1f}" y2="{top + plot_h}" stroke="{color}" '
+            f'stroke-width="1.5" stroke-dasharray="6 3"/>'
+        )
+        lx = left + plot_w - 130
+        out.append(
+            f'<line x1="{lx}" y1="{legend_y - 4}" x2="{lx + 20}" y2="{legend_y - 4}" stroke="{color}" '
+            f'stroke-width="1.5" stroke-dasharray="6 3"/>'
+        )
+        out.append(f'<text x="{lx + 26}" y="{legend_y}" font-size="10">{html.escape(label)}</text>')
+        legend_y += 14
+    out.append("</svg>")
+    return "\n".join(out) + "\n"
+
+
+def _file_entries(
+    fname: Path, reader: KanaReader, unit: str, journal: Journal | None, on_error: str, progress: Progress
+) -> LineTable | None:
+    key = file_key(fname) if journal is not None else None
+    if journal is not None:
+        entries = journal.get(key)
+        if entries is not None:
+            return entries
+    try:
+        with progress.stage("parse"):
+            items = parse_file(fname)
+        with progress.stage("analyze"):
+            entries = line_table(items, reader, unit)
+    except Exception as exc:
+        if on_error == "abort":
+            raise
+        print(f"Skipping {fname}: {exc}", file=sys.stderr)
+        return None
+    if journal is not None:
+        journal.record(key, entries)
+    return entries
 
 
-def _line_rates(items, reader: KanaReader, unit: str) -> list[tuple[float, float]]:
-    return [(e[3], e[4]) for e in _line_entries(items, reader, unit)]
+def _episode_rate(entries: LineTable, trim_outliers: bool) -> float:
+    total, minutes = summarize(entries, trim_outliers, trim_min_lines=0)
+    return (total / minutes) if minutes > 0 else 0.0
 
 
 def _collect_show_dirs(root: Path, exclude_subtitle_backup: bool) -> list[Path]:
@@ -216,7 +268,46 @@ def main():
         default="rate_distributions",
         help="Output directory for per-show images (default: rate_distributions)",
     )
+    parser.add_argument(
+        "--renderer",
+        choices=["png", "svg", "html"],
+        default="png",
+        help="png: matplotlib images; svg: one small SVG per show; html: all shows in one HTML report "
+        "(svg and html do not need matplotlib) (default: png)",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Checkpoint completed files' per-line results to this journal file",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse results already in --journal instead of starting over",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=20,
+        help="Flush the journal to disk every N files (default: 20)",
+    )
+    parser.add_argument(
+        "--on-error",
+        choices=["abort", "skip"],
+        default="abort",
+        help="What to do when a subtitle file fails to parse or analyze (default: abort)",
+    )
+    parser.add_argument(
+        "--progress",
+        action=argparse.BooleanOptionalAction,
+        help="Show files/lines done, lines/s, ETA and the current file on stderr (default: when stderr is a terminal)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Keep Prometheus text-format run metrics in this file (e.g. for node-exporter's textfile collector)",
+    )
     args = parser.parse_args()
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
 
     root = Path(args.root).expanduser().resolve()
     show_dirs = _collect_show_dirs(root, not args.include_subtitle_backup)
@@ -225,85 +316,146 @@ def main():
         return
 
     reader = KanaReader()
-
-    show_rates: dict[str, list[float]] = {}
-    for d in show_dirs:
-        rates = []
-        for fname in sorted(d.iterdir()):
-            if fname.suffix.lower() not in (".srt", ".ass"):
-                continue
-            items = _parse_items(fname)
-            if args.granularity == "episode":
-                rate = _episode_rate(items, reader, args.unit, args.trim_outliers)
-                if rate > 0:
-                    rates.append(rate)
-            else:
-                rates.extend(_line_rates(items, reader, args.unit))
-        if rates:
-            if args.granularity == "line":
-                values = [r for r, _ in rates]
-                weights = [w for _, w in rates]
-                if args.trim_outliers:
-                    value_set = _trim_iqr(values)
-                    filtered = [(r, w) for r, w in rates if r in value_set]
-                    values = [r for r, _ in filtered]
-                    weights = [w for _, w in filtered]
-                show_rates[d.name] = list(zip(values, weights))
-            else:
-                show_rates[d.name] = rates
+    journal = None
+    if args.journal:
+        try:
+            journal = Journal(
+                Path(args.journal).expanduser(),
+                {"unit": args.unit},
+                resume=args.resume,
+                checkpoint_every=args.checkpoint_every,
+            )
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+
+    show_rates: dict[str, tuple[array, array | None]] = {}
+    show_files = [
+        (d, [f for f in sorted(d.iterdir()) if f.suffix.lower() in (".srt", ".ass")]) for d in show_dirs
+    ]
+    progress = Progress(
+        sum(len(fnames) for _, fnames in show_files),
+        "visualize_rates",
+        show=args.progress,
+        metrics_path=Path(args.metrics_file).expanduser() if args.metrics_file else None,
+    )
+    try:
+        for d, fnames in show_files:
+            rates = array("d")
+            show_lines = LineTable()
+            for fname in fnames:
+                progress.start_file(fname)
+                entries = _file_entries(fname, reader, args.unit, journal, args.on_error, progress)
+                progress.file_done(len(entries) if entries is not None else 0, error=entries is None)
+                if entries is None:
+                    continue
+                if args.granularity == "episode":
+                    rate = _episode_rate(entries, args.trim_outliers)
+                    if rate > 0:
+                        rates.append(rate)
+                else:
+                    show_lines.extend(entries)
+            if args.granularity == "line" and show_lines:
+                values = show_lines.rates()
+                weights = show_lines.durations()
+                mask = iqr_mask(values, min_count=4) if args.trim_outliers else None
+                if mask is not None:
+                    values = array("d", compress(values, mask))
+                    weights = array("d", compress(weights, mask))
+                show_rates[d.name] = (values, weights)
+            elif rates:
+                show_rates[d.name] = (rates, None)
+    finally:
+        if journal is not None:
+            journal.close()
+        progress.close()
 
     if not show_rates:
         print("No valid subtitle entries found.")
         return
 
-    plt.rcParams["font.family"] = "Hiragino Sans"
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
+    if args.renderer == "png":
+        # Imported only here so the SVG/HTML renderers never pay for matplotlib.
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        plt.rcParams["font.family"] = "Hiragino Sans"
 
     def safe_name(name: str) -> str:
         # Preserve Unicode (including CJK). Only replace path-unsafe characters.
         return "".join("_" if ch in ("/", "\0", ":") else ch for ch in name).strip()
 
-    for show, rates in show_rates.items():
-        fig, ax = plt.subplots(1, 1, figsize=(8, 4), constrained_layout=True)
-        bins = 20
-        if args.granularity == "line":
-            values = [r for r, _ in rates]
-            weights = [w for _, w in rates] if args.weight_by_duration else None
-            ax.hist(values, bins=bins, weights=weights)
-        else:
-            values = list(rates)
+    suffix = ""
+    weight_note = ""
+    if args.granularity == "line" and args.weight_by_duration:
+        suffix = "_timeweighted"
+        weight_note = " (time-weighted)"
+    if args.granularity == "episode":
+        ylabel = "Episode count"
+    elif args.weight_by_duration:
+        ylabel = "Weighted seconds"
+    else:
+        ylabel = "Line count"
+    xlabel = f"{args.unit}/min"
+
+    report = []
+    bins = 20
+    for show, (values, weights) in show_rates.items():
+        if not args.weight_by_duration:
             weights = None
-            ax.hist(rates, bins=bins)
         mean = _weighted_mean(values, weights)
         median = _weighted_median(values, weights)
-        mode = _histogram_mode(values, weights, bins=bins)
-        ax.axvline(mean, color="red", linestyle="--", linewidth=1.5, label=f"mean={mean:.2f}")
-        ax.axvline(median, color="tab:orange", linestyle="--", linewidth=1.5, label=f"median={median:.2f}")
-        ax.axvline(mode, color="tab:green", linestyle="--", linewidth=1.5, label=f"mode≈{mode:.2f}")
-        if args.granularity == "episode":
-            subtitle = f"{len(rates)} eps"
-        else:
-            subtitle = f"{len(rates)} lines"
-        weight_note = ""
-        if args.granularity == "line" and args.weight_by_duration:
-            weight_note = " (time-weighted)"
-        ax.set_title(f"{show} ({subtitle}) - {args.unit}/min distribution{weight_note}")
-        ax.set_xlabel(f"{args.unit}/min")
+        hist = _histogram(values, weights, bins)
+        mode = _histogram_mode(hist)
         if args.granularity == "episode":
-            ax.set_ylabel("Episode count")
-        elif args.weight_by_duration:
-            ax.set_ylabel("Weighted seconds")
+            subtitle = f"{len(values)} eps"
         else:
-            ax.set_ylabel("Line count")
-        ax.legend(fontsize=8)
-        suffix = ""
-        if args.granularity == "line" and args.weight_by_duration:
-            suffix = "_timeweighted"
-        filename = safe_name(show) + f"_{args.unit}_{args.granularity}{suffix}.png"
-        out_path = out_dir / filename
-        fig.savefig(out_path, dpi=150)
-        plt.close(fig)
+            subtitle = f"{len(values)} lines"
+        title = f"{show} ({subtitle}) - {args.unit}/min distribution{weight_note}"
+        stem = safe_name(show) + f"_{args.unit}_{args.granularity}{suffix}"
+
+        if args.renderer == "png":
+            fig, ax = plt.subplots(1, 1, figsize=(8, 4), constrained_layout=True)
+            ax.hist(values, bins=bins, weights=weights)
+            ax.axvline(mean, color="red", linestyle="--", linewidth=1.5, label=f"mean={mean:.2f}")
+            ax.axvline(median, color="tab:orange", linestyle="--", linewidth=1.5, label=f"median={median:.2f}")
+            ax.axvline(mode, color="tab:green", linestyle="--", linewidth=1.5, label=f"mode≈{mode:.2f}")
+            ax.set_title(title)
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.legend(fontsize=8)
+            out_path = out_dir / f"{stem}.png"
+            fig.savefig(out_path, dpi=150)
+            plt.close(fig)
+            print(f"Wrote {out_path}")
+            continue
+
+        markers = [(f"mean={mean:.2f}", mean), (f"median={median:.2f}", median), (f"mode≈{mode:.2f}", mode)]
+        svg = _render_svg(hist, markers, title, xlabel, ylabel)
+        if args.renderer == "html":
+            report.append((show, svg))
+            continue
+        out_path = out_dir / f"{stem}.svg"
+        out_path.write_text(svg, encoding="utf-8")
+        print(f"Wrote {out_path}")
+
+    if args.renderer == "html":
+        out_path = out_dir / f"report_{args.unit}_{args.granularity}{suffix}.html"
+        parts = [
+            '<!DOCTYPE html>\n<html><head><meta charset="utf-8">',
+            f"<title>{html.escape(xlabel)} distributions</title>",
+            "<style>body{font-family:sans-serif;margin:2em}nav a{margin-right:1em}section{margin:2em 0}</style>",
+            "</head><body>",
+            f"<h1>{html.escape(xlabel)} distributions ({args.granularity}{weight_note})</h1>",
+            "<nav>" + "".join(f'<a href="#show-{i}">{html.escape(show)}</a>' for i, (show, _) in enumerate(report)) + "</nav>",
+        ]
+        for i, (show, svg) in enumerate(report):
+            parts.append(f'<section id="show-{i}"><h2>{html.escape(show)}</h2>\n{svg}</section>')
+        parts.append("</body></html>\n")
+        out_path.write_text("\n".join(parts), encoding="utf-8")
         print(f"Wrote {out_path}")
 
 
@@ -1 +1 @@
-__all__ = ["cli", "parsing", "reading"]
+__all__ = ["api", "cli", "index", "journal", "lines", "memo", "parsing", "progress", "reading", "reading_cache", "timeline", "watch"]
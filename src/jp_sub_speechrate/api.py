@@ -0,0 +1,354 @@
+import io
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, ContextManager, Iterable, Iterator, Optional, Tuple, TypeVar, Union
+
+from .lines import LineTable, iqr_mask
+from .parsing import parse_ass, parse_srt, spoken_text, stream_subtitles
+from .reading import KanaReader, load_dictionary
+
+if TYPE_CHECKING:
+    from .reading_cache import ReadingCache
+
+
+UNITS = ("mora", "kana", "syllable")
+ON_ERROR = ("abort", "skip")
+Item = Tuple[int, int, str]
+
+
+@dataclass(frozen=True)
+class LineResult:
+    start_ms: int
+    end_ms: int
+    text: str
+    reading: str
+    units: int
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end_ms - self.start_ms) / 1000.0
+
+    @property
+    def rate(self) -> float:
+        return self.units / ((self.end_ms - self.start_ms) / 1000.0 / 60.0)
+
+
+@dataclass
+class EpisodeResult:
+    path: Optional[str]
+    units: int = 0
+    minutes: float = 0.0
+    lines: LineTable = field(default_factory=LineTable, repr=False)
+    error: Optional[str] = None
+
+    @property
+    def rate(self) -> float:
+        return (self.units / self.minutes) if self.minutes > 0 else 0.0
+
+
+class ReaderPool:
+    # A fixed set of KanaReaders handed out one caller at a time, for services that
+    # analyze from several threads without loading a dictionary per request.
+    def __init__(
+        self,
+        size: int = 1,
+        factory=KanaReader,
+        dict_type: Optional[str] = None,
+        split_mode: str = "C",
+        cache: Optional["ReadingCache"] = None,
+    ):
+        self._readers: "queue.Queue[KanaReader]" = queue.Queue()
+        if factory is KanaReader:
+            shared = load_dictionary(dict_type)
+            factory = lambda: KanaReader(shared, split_mode=split_mode, cache=cache)  # noqa: E731
+        for _ in range(size):
+            self._readers.put(factory())
+
+    @contextmanager
+    def acquire(self) -> Iterator[KanaReader]:
+        reader = self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put(reader)
+
+
+class ThreadReaders:
+    # One KanaReader per thread, created on first use from a single shared Sudachi
+    # dictionary, so N threads cost one dictionary load instead of N.
+    def __init__(
+        self,
+        sudachi_dictionary=None,
+        dict_type: Optional[str] = None,
+        split_mode: str = "C",
+        cache: Optional["ReadingCache"] = None,
+    ):
+        if sudachi_dictionary is None:
+            sudachi_dictionary = load_dictionary(dict_type)
+        self._dictionary = sudachi_dictionary
+        self._split_mode = split_mode
+        self.cache = cache
+        self._local = threading.local()
+
+    def get(self) -> KanaReader:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = KanaReader(self._dictionary, split_mode=self._split_mode, cache=self.cache)
+        return reader
+
+
+ReaderSource = Union[KanaReader, ReaderPool, ThreadReaders, None]
+
+_default_reader: Optional[KanaReader] = None
+_default_lock = threading.Lock()
+
+
+def default_reader() -> KanaReader:
+    # Shared, lazily created reader so repeated calls pay the Sudachi startup only once.
+    global _default_reader
+    with _default_lock:
+        if _default_reader is None:
+            _default_reader = KanaReader()
+        return _default_reader
+
+
+@contextmanager
+def _use_reader(source: ReaderSource) -> Iterator[KanaReader]:
+    if isinstance(source, ReaderPool):
+        with source.acquire() as reader:
+            yield reader
+    elif isinstance(source, ThreadReaders):
+        yield source.get()
+    else:
+        yield source if source is not None else default_reader()
+
+
+def _check_unit(unit: str) -> None:
+    if unit not in UNITS:
+        raise ValueError(f"unit must be one of {', '.join(UNITS)}, got {unit!r}")
+
+
+def _check_on_error(on_error: str) -> None:
+    if on_error not in ON_ERROR:
+        raise ValueError(f"on_error must be one of {', '.join(ON_ERROR)}, got {on_error!r}")
+
+
+def count_units(reader: KanaReader, reading: str, unit: str) -> int:
+    if unit == "mora":
+        return reader.count_mora(reading)
+    if unit == "syllable":
+        return reader.count_syllable(reading)
+    return reader.count_kana(reading)
+
+
+def iter_lines(items: Iterable[Item], reader: ReaderSource = None, unit: str = "mora") -> Iterator[LineResult]:
+    # Streams one LineResult per spoken line with a positive duration and unit count.
+    _check_unit(unit)
+    strip_sokuon = unit == "kana"
+    with _use_reader(reader) as kana_reader:
+        for start, end, text in items:
+            if not text.strip():
+                continue
+            text = spoken_text(text)
+            if not text.strip():
+                continue
+            if end - start <= 0:
+                continue
+            reading = kana_reader.to_kana(text, strip_sokuon=strip_sokuon)
+            units = count_units(kana_reader, reading, unit)
+            if units <= 0:
+                continue
+            yield LineResult(start, end, text, reading, units)
+
+
+def line_table(items: Iterable[Item], reader: ReaderSource = None, unit: str = "mora") -> LineTable:
+    lines = LineTable()
+    for line in iter_lines(items, reader, unit):
+        lines.append(line.start_ms, line.end_ms, line.units)
+    return lines
+
+
+def summarize(lines: LineTable, trim_outliers: bool = True, trim_min_lines: int = 4) -> Tuple[int, float]:
+    # Total units and merged minutes, after IQR-trimming per-line rates when requested
+    # and there are at least `trim_min_lines` lines.
+    mask = iqr_mask(lines.rates(), min_count=trim_min_lines) if trim_outliers else None
+    total_units = lines.total_count(mask)
+    total_ms = lines.merged_ms(mask)
+    minutes = total_ms / 1000.0 / 60.0 if total_ms > 0 else 0.0
+    return total_units, minutes
+
+
+def parse_file(path: Union[str, os.PathLike]) -> Iterable[Item]:
+    # "-" streams SRT or ASS (sniffed) from stdin instead of reading a whole file.
+    if os.fspath(path) == "-":
+        return stream_subtitles(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace"))
+    ext = os.path.splitext(os.fspath(path))[1].lower()
+    if ext == ".srt":
+        return parse_srt(os.fspath(path))
+    # Anything else is read as ASS/SSA, as the CLI always did.
+    return parse_ass(os.fspath(path))
+
+
+def analyze_items(
+    items: Iterable[Item],
+    reader: ReaderSource = None,
+    unit: str = "mora",
+    trim_outliers: bool = True,
+    trim_min_lines: int = 4,
+    path: Optional[str] = None,
+) -> EpisodeResult:
+    lines = line_table(items, reader, unit)
+    units, minutes = summarize(lines, trim_outliers, trim_min_lines)
+    return EpisodeResult(path, units, minutes, lines)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def file_cost(path: Union[str, os.PathLike]) -> int:
+    # Byte size as a cheap stand-in for the number of lines to tokenize.
+    try:
+        return os.stat(path).st_size
+    except (OSError, ValueError):
+        return 0
+
+
+def map_largest_first(
+    func: Callable[[T], R], items: Iterable[T], cost: Callable[[T], int], threads: int, window: int = 4
+) -> Iterator[R]:
+    # Ordered map that dispatches the most expensive items first, so a few large items
+    # (movies, specials) start early instead of leaving one worker busy at the end of the
+    # run. Results still come out in input order. At most `window * threads` items are
+    # submitted but not yet yielded (plus the one the consumer is waiting for, which is
+    # submitted out of turn if needed), which bounds the results held in memory. The
+    # input is materialized to sort it.
+    items = list(items)
+    if threads <= 1:
+        yield from map(func, items)
+        return
+    order = sorted(range(len(items)), key=lambda i: cost(items[i]), reverse=True)
+    limit = max(1, window) * threads
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures: list = [None] * len(items)
+        submitted = [False] * len(items)
+        outstanding = 0
+        next_cost = 0
+
+        def submit(i: int) -> None:
+            nonlocal outstanding
+            futures[i] = executor.submit(func, items[i])
+            submitted[i] = True
+            outstanding += 1
+
+        try:
+            for i in range(len(items)):
+                while outstanding < limit and next_cost < len(order):
+                    j = order[next_cost]
+                    next_cost += 1
+                    if not submitted[j]:
+                        submit(j)
+                if not submitted[i]:
+                    submit(i)
+                result = futures[i].result()
+                futures[i] = None
+                outstanding -= 1
+                yield result
+        finally:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+
+
+def chunked_line_table(
+    items: Iterable[Item],
+    reader: ReaderSource = None,
+    unit: str = "mora",
+    executor: Optional[ThreadPoolExecutor] = None,
+    chunk_lines: int = 1000,
+) -> LineTable:
+    # line_table for a single large file split across an executor: chunks of
+    # `chunk_lines` parsed lines are tokenized concurrently (the caller's thread takes the
+    # first one) and concatenated in order, so the result equals line_table(items). The
+    # reader must be safe to use from several threads (ThreadReaders or ReaderPool).
+    if executor is None or not isinstance(items, list) or len(items) <= chunk_lines:
+        return line_table(items, reader, unit)
+    chunks = [items[i : i + chunk_lines] for i in range(0, len(items), chunk_lines)]
+    futures = [executor.submit(line_table, chunk, reader, unit) for chunk in chunks[1:]]
+    lines = line_table(chunks[0], reader, unit)
+    for future in futures:
+        lines.extend(future.result())
+    return lines
+
+
+def analyze_files(
+    paths: Iterable[Union[str, os.PathLike]],
+    reader: ReaderSource = None,
+    unit: str = "mora",
+    trim_outliers: bool = True,
+    trim_min_lines: int = 4,
+    on_error: str = "abort",
+    threads: int = 1,
+    chunk_lines: int = 1000,
+    on_start: Optional[Callable[[str], None]] = None,
+    stage: Optional[Callable[[str], ContextManager]] = None,
+) -> Iterator[EpisodeResult]:
+    # Lazily yields one EpisodeResult per path, in input order. With on_error="skip" a
+    # file that fails to parse or analyze is yielded with `error` set instead of raising.
+    # With threads > 1 files are dispatched largest first (by byte size) and files with
+    # more than `chunk_lines` lines are tokenized in chunks on a second pool; a plain
+    # KanaReader is then replaced by per-thread readers sharing its dictionary, split mode
+    # and cache, and `paths` is read up front. `on_start` is called with each path as its
+    # work begins; `stage` (e.g. Progress.stage) is entered around the "parse", "analyze"
+    # and "summarize" steps of every file. Arguments are checked when analyze_files is
+    # called rather than on the first next().
+    _check_unit(unit)
+    _check_on_error(on_error)
+    if threads > 1 and not isinstance(reader, (ReaderPool, ThreadReaders)):
+        if reader is None:
+            reader = ThreadReaders()
+        elif isinstance(reader, KanaReader):
+            reader = ThreadReaders(reader.dictionary, split_mode=reader.split_mode, cache=reader.cache)
+        else:
+            raise ValueError("threads > 1 needs a KanaReader, ReaderPool or ThreadReaders reader")
+    return _analyze_files(
+        paths, reader, unit, trim_outliers, trim_min_lines, on_error, threads, chunk_lines, on_start, stage
+    )
+
+
+def _analyze_files(
+    paths, reader, unit, trim_outliers, trim_min_lines, on_error, threads, chunk_lines, on_start, stage
+) -> Iterator[EpisodeResult]:
+    # Chunk tasks never wait on other tasks, so a separate pool cannot deadlock.
+    chunk_pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+    def analyze(path) -> EpisodeResult:
+        if on_start is not None:
+            on_start(os.fspath(path))
+        timed = stage if stage is not None else lambda name: nullcontext()
+        try:
+            with timed("parse"):
+                items = parse_file(path)
+            with timed("analyze"):
+                lines = chunked_line_table(items, reader, unit, chunk_pool, chunk_lines)
+            with timed("summarize"):
+                units, minutes = summarize(lines, trim_outliers, trim_min_lines)
+            return EpisodeResult(os.fspath(path), units, minutes, lines)
+        except Exception as exc:
+            if on_error == "abort":
+                raise
+            return EpisodeResult(os.fspath(path), error=str(exc))
+
+    try:
+        if threads > 1:
+            yield from map_largest_first(analyze, paths, file_cost, threads)
+        else:
+            yield from map(analyze, paths)
+    finally:
+        if chunk_pool is not None:
+            chunk_pool.shutdown(cancel_futures=True)
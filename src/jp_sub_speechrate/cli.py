@@ -4,82 +4,22 @@ import os
 import sys
 
 try:
-    from .parsing import merge_intervals, parse_ass, parse_srt, strip_nonspoken
-    from .reading import KanaReader
+    from .api import ThreadReaders, analyze_files
+    from .memo import DEFAULT_MAXSIZE, set_memo_size
+    from .progress import Progress
+    from .reading import SPLIT_MODES, KanaReader
 except ImportError:
     # Allow running as a script: `uv run src/jp_sub_speechrate/cli.py ...`
     pkg_dir = os.path.dirname(__file__)
     sys.path.insert(0, os.path.dirname(pkg_dir))
-    from jp_sub_speechrate.parsing import merge_intervals, parse_ass, parse_srt, strip_nonspoken
-    from jp_sub_speechrate.reading import KanaReader
-
-
-def _percentile(sorted_vals: list[float], p: float) -> float:
-    if not sorted_vals:
-        return 0.0
-    if p <= 0:
-        return sorted_vals[0]
-    if p >= 100:
-        return sorted_vals[-1]
-    k = (len(sorted_vals) - 1) * (p / 100.0)
-    f = int(k)
-    c = min(f + 1, len(sorted_vals) - 1)
-    if f == c:
-        return sorted_vals[f]
-    return sorted_vals[f] * (c - k) + sorted_vals[c] * (k - f)
-
-
-def _analyze_items(items, reader: KanaReader, unit: str, trim_outliers: bool):
-    entries = []
-    for start, end, text in items:
-        if not text.strip():
-            continue
-        text = strip_nonspoken(text)
-        if not text.strip():
-            continue
-        duration_ms = end - start
-        if duration_ms <= 0:
-            continue
-        strip_sokuon = unit == "kana"
-        reading = reader.to_kana(text, strip_sokuon=strip_sokuon)
-        if unit == "mora":
-            units = reader.count_mora(reading)
-        elif unit == "syllable":
-            units = reader.count_syllable(reading)
-        else:
-            units = reader.count_kana(reading)
-        if units <= 0:
-            continue
-        rate = units / (duration_ms / 1000.0 / 60.0)
-        entries.append((start, end, units, rate))
-
-    if not entries:
-        return 0, 0.0, 0.0
-
-    if trim_outliers and len(entries) >= 4:
-        rates = sorted(e[3] for e in entries)
-        q1 = _percentile(rates, 25)
-        q3 = _percentile(rates, 75)
-        iqr = q3 - q1
-        if iqr > 0:
-            lower = q1 - 1.5 * iqr
-            upper = q3 + 1.5 * iqr
-            entries = [e for e in entries if lower <= e[3] <= upper]
-
-    if not entries:
-        return 0, 0.0, 0.0
-
-    total_units = sum(e[2] for e in entries)
-    intervals = [(e[0], e[1]) for e in entries]
-    merged = merge_intervals(intervals)
-    total_ms = sum(e - s for s, e in merged)
-    minutes = total_ms / 1000.0 / 60.0 if total_ms > 0 else 0.0
-    rate = (total_units / minutes) if minutes > 0 else 0.0
-    return total_units, minutes, rate
+    from jp_sub_speechrate.api import ThreadReaders, analyze_files
+    from jp_sub_speechrate.memo import DEFAULT_MAXSIZE, set_memo_size
+    from jp_sub_speechrate.progress import Progress
+    from jp_sub_speechrate.reading import SPLIT_MODES, KanaReader
 
 
 def _collect_files(path: str):
-    if os.path.isfile(path):
+    if path == "-" or os.path.isfile(path):
         return [path]
     escaped = glob.escape(path)
     srt_files = sorted(glob.glob(os.path.join(escaped, "*.srt")))
@@ -91,7 +31,7 @@ def _collect_files(path: str):
 
 def main():
     parser = argparse.ArgumentParser(description="Compute mora/kana/syllable rates from subtitles.")
-    parser.add_argument("path", help="Subtitle file or directory")
+    parser.add_argument("path", help="Subtitle file or directory, or - to stream SRT/ASS from stdin")
     parser.add_argument("--kana", action="store_true", help="Compute kana-per-minute instead of mora-per-minute")
     parser.add_argument(
         "--unit",
@@ -103,6 +43,47 @@ def main():
         action="store_true",
         help="Include per-line rate outliers (by default they are trimmed using IQR)",
     )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Analyze files on N threads with per-thread tokenizers sharing one dictionary (default: 1)",
+    )
+    parser.add_argument(
+        "--dict",
+        help="Sudachi dictionary: core, small, full, or a path to a system .dic (default: Sudachi's default)",
+    )
+    parser.add_argument(
+        "--split-mode",
+        choices=SPLIT_MODES,
+        default="C",
+        help="Sudachi split mode (default: C)",
+    )
+    parser.add_argument(
+        "--reading-cache",
+        help="Share kana readings through this memory-mapped cache file (kept and reused across runs and processes)",
+    )
+    parser.add_argument(
+        "--reading-cache-size",
+        type=int,
+        default=64,
+        help="Size in MB of a newly created --reading-cache file (default: 64)",
+    )
+    parser.add_argument(
+        "--progress",
+        action=argparse.BooleanOptionalAction,
+        help="Show files/lines done, lines/s, ETA and the current file on stderr (default: when stderr is a terminal)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Keep Prometheus text-format run metrics in this file (e.g. for node-exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--text-memo-size",
+        type=int,
+        default=DEFAULT_MAXSIZE,
+        help=f"Distinct lines remembered per text normalization step; 0 disables (default: {DEFAULT_MAXSIZE})",
+    )
     args = parser.parse_args()
 
     files = _collect_files(args.path)
@@ -110,7 +91,20 @@ def main():
         print("No .srt or .ass files found.")
         return
 
-    reader = KanaReader()
+    set_memo_size(args.text_memo_size)
+    cache = None
+    if args.reading_cache:
+        # Imported here: it needs fcntl, which Windows lacks.
+        from jp_sub_speechrate.reading_cache import ReadingCache, settings_key
+
+        try:
+            cache = ReadingCache(
+                os.path.expanduser(args.reading_cache),
+                args.reading_cache_size,
+                settings_key(args.dict, args.split_mode),
+            )
+        except (RuntimeError, ValueError) as exc:
+            raise SystemExit(str(exc))
     if args.unit:
         unit = args.unit
     else:
@@ -119,16 +113,43 @@ def main():
     total_minutes = 0.0
 
     trim_outliers = not args.include_outliers
-    for path in files:
-        ext = os.path.splitext(path)[1].lower()
-        if ext == ".srt":
-            items = parse_srt(path)
+    progress = Progress(
+        len(files),
+        "jsub_rate",
+        show=args.progress,
+        metrics_path=os.path.expanduser(args.metrics_file) if args.metrics_file else None,
+        cache=cache,
+    )
+    results = None
+    try:
+        if args.threads > 1:
+            reader = ThreadReaders(dict_type=args.dict, split_mode=args.split_mode, cache=cache)
         else:
-            items = parse_ass(path)
-        units, minutes, rate = _analyze_items(items, reader, unit, trim_outliers)
-        total_units += units
-        total_minutes += minutes
-        print(f"{os.path.basename(path)}\t{units} {unit}\t{minutes:.2f} min\t{rate:.2f} {unit}/min")
+            reader = KanaReader(dict_type=args.dict, split_mode=args.split_mode, cache=cache)
+        results = analyze_files(
+            files,
+            reader,
+            unit,
+            trim_outliers,
+            threads=args.threads,
+            on_start=progress.start_file,
+            stage=progress.stage,
+        )
+        for result in results:
+            progress.file_done(len(result.lines), error=result.error is not None)
+            total_units += result.units
+            total_minutes += result.minutes
+            print(
+                f"{os.path.basename(result.path)}\t{result.units} {unit}\t{result.minutes:.2f} min"
+                f"\t{result.rate:.2f} {unit}/min"
+            )
+    finally:
+        if results is not None:
+            results.close()
+        progress.close()
+        if cache is not None:
+            print(cache.stats(), file=sys.stderr)
+            cache.close()
 
     total_rate = (total_units / total_minutes) if total_minutes > 0 else 0.0
     print(f"TOTAL\t{total_units} {unit}\t{total_minutes:.2f} min\t{total_rate:.2f} {unit}/min")
@@ -0,0 +1,173 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .lines import LineTable
+
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE shows (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    episodes INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    minutes REAL NOT NULL,
+    rate REAL NOT NULL,
+    line_median_tw REAL NOT NULL,
+    episode_median_rate REAL NOT NULL
+);
+CREATE TABLE episodes (
+    id INTEGER PRIMARY KEY,
+    show_id INTEGER NOT NULL REFERENCES shows(id),
+    file TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    minutes REAL NOT NULL,
+    rate REAL NOT NULL
+);
+CREATE TABLE lines (
+    episode_id INTEGER NOT NULL REFERENCES episodes(id),
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    duration_s REAL NOT NULL,
+    rate REAL NOT NULL
+);
+"""
+
+# Created after the bulk load, which is much faster than maintaining them per insert.
+INDEXES = """
+CREATE INDEX shows_rate ON shows(rate);
+CREATE INDEX shows_minutes ON shows(minutes);
+CREATE INDEX episodes_show ON episodes(show_id);
+CREATE INDEX episodes_rate ON episodes(rate);
+CREATE INDEX episodes_minutes ON episodes(minutes);
+CREATE INDEX lines_episode ON lines(episode_id);
+CREATE INDEX lines_rate ON lines(rate);
+CREATE INDEX lines_duration ON lines(duration_s);
+"""
+
+
+def _median(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    mid = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2.0
+
+
+def write_index(path: Path, settings: dict, shows: Iterable) -> None:
+    # `shows` yields (path, name, row, episodes) where row is (units, minutes, rate,
+    # line_median_tw) and episodes are (file, units, minutes, LineTable). The database is
+    # rebuilt from scratch inside a single transaction.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in settings.items()])
+            for show_path, name, row, episodes in shows:
+                units, minutes, rate, line_median_tw = row
+                episode_rates = [u / m for _, u, m, _ in episodes if m > 0]
+                show_id = conn.execute(
+                    "INSERT INTO shows (path, name, episodes, units, minutes, rate, line_median_tw, "
+                    "episode_median_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (show_path, name, len(episodes), units, minutes, rate, line_median_tw, _median(episode_rates)),
+                ).lastrowid
+                for file, ep_units, ep_minutes, lines in episodes:
+                    episode_id = conn.execute(
+                        "INSERT INTO episodes (show_id, file, lines, units, minutes, rate) VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            show_id,
+                            file,
+                            len(lines),
+                            ep_units,
+                            ep_minutes,
+                            ep_units / ep_minutes if ep_minutes > 0 else 0.0,
+                        ),
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO lines VALUES (?, ?, ?, ?, ?, ?)",
+                        _line_rows(episode_id, lines),
+                    )
+            conn.executescript(INDEXES)
+    finally:
+        conn.close()
+    tmp.replace(path)
+
+
+def _line_rows(episode_id: int, lines: LineTable):
+    for (start, end, count), rate in zip(lines.rows(), lines.rates()):
+        yield episode_id, start, end, count, (end - start) / 1000.0, rate
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Index not found: {path}")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def settings(conn: sqlite3.Connection) -> dict[str, str]:
+    return dict(conn.execute("SELECT key, value FROM meta"))
+
+
+SHOW_ORDER = {"rate": "rate", "minutes": "minutes", "episodes": "episodes", "name": "name"}
+
+
+def query_shows(
+    conn: sqlite3.Connection,
+    min_rate: Optional[float] = None,
+    max_rate: Optional[float] = None,
+    min_episodes: Optional[int] = None,
+    min_minutes: Optional[float] = None,
+    order: str = "rate",
+    descending: bool = False,
+    limit: Optional[int] = None,
+) -> list[tuple]:
+    clauses = []
+    params: list = []
+    for clause, value in (
+        ("rate >= ?", min_rate),
+        ("rate <= ?", max_rate),
+        ("episodes >= ?", min_episodes),
+        ("minutes >= ?", min_minutes),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    sql = "SELECT name, episodes, units, minutes, rate, line_median_tw FROM shows"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {SHOW_ORDER[order]} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def query_drift(conn: sqlite3.Connection, threshold: float, limit: Optional[int] = None) -> list[tuple]:
+    # Episodes whose rate deviates from their show's median episode rate by more than
+    # `threshold` (a fraction, e.g. 0.15), largest deviation first.
+    sql = (
+        "SELECT s.name, e.file, e.rate, s.episode_median_rate, "
+        "(e.rate - s.episode_median_rate) / s.episode_median_rate AS drift "
+        "FROM episodes e JOIN shows s ON s.id = e.show_id "
+        "WHERE s.episode_median_rate > 0 AND e.minutes > 0 "
+        "AND ABS(e.rate - s.episode_median_rate) > ? * s.episode_median_rate "
+        "ORDER BY ABS(drift) DESC"
+    )
+    params: list = [threshold]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .lines import LineTable
+
+
+def file_key(path: Path) -> str:
+    # Files that changed since they were journaled get a different key and are redone.
+    st = path.stat()
+    return f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+
+
+# Append-only JSON-lines log of per-file (start, end, count) results. The first line
+# holds the run settings; records are flushed every `checkpoint_every` files, so a
+# crash loses at most that many files of work.
+class Journal:
+    def __init__(self, path: Path, settings: dict, resume: bool = False, checkpoint_every: int = 20):
+        self.path = Path(path)
+        self.settings = settings
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.done: dict[str, LineTable] = {}
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+
+        if resume and self.path.exists():
+            self._drop_torn_tail()
+        if resume and self.path.exists() and self.path.stat().st_size > 0:
+            self.done = self._load()
+            self._file = self.path.open("a", encoding="utf-8")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", encoding="utf-8")
+            self._file.write(json.dumps(settings, sort_keys=True) + "\n")
+            self._sync()
+
+    def _drop_torn_tail(self) -> None:
+        # An interrupted write can leave a partial last line; cut it off so new records
+        # start on a line of their own instead of being appended to the fragment.
+        with self.path.open("rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                cut = f.read(pos - start).rfind(b"\n")
+                if cut >= 0:
+                    f.truncate(start + cut + 1)
+                    return
+                pos = start
+            f.truncate(0)
+
+    def _load(self) -> dict[str, LineTable]:
+        done: dict[str, LineTable] = {}
+        with self.path.open("r", encoding="utf-8") as f:
+            header = f.readline()
+            if header and json.loads(header) != self.settings:
+                raise ValueError(f"Journal {self.path} was written with different settings; cannot resume")
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final write from an interrupted run.
+                    continue
+                done[record["key"]] = LineTable.from_rows(record["lines"])
+        return done
+
+    def get(self, key: str) -> Optional[LineTable]:
+        return self.done.get(key)
+
+    def record(self, key: str, lines: LineTable) -> None:
+        record = json.dumps({"key": key, "lines": list(lines.rows())}, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self.done[key] = lines
+            self._pending.append(record)
+            if len(self._pending) >= self.checkpoint_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._file.write("\n".join(self._pending) + "\n")
+        self._pending.clear()
+        self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
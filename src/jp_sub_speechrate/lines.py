@@ -0,0 +1,85 @@
+from array import array
+from itertools import compress
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .parsing import merged_duration
+
+
+def percentile(sorted_vals, p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    if p <= 0:
+        return sorted_vals[0]
+    if p >= 100:
+        return sorted_vals[-1]
+    k = (len(sorted_vals) - 1) * (p / 100.0)
+    f = int(k)
+    c = min(f + 1, len(sorted_vals) - 1)
+    if f == c:
+        return sorted_vals[f]
+    return sorted_vals[f] * (c - k) + sorted_vals[c] * (k - f)
+
+
+def iqr_mask(values, min_count: int = 0) -> Optional[bytearray]:
+    # Returns a keep-mask for values within 1.5 IQR, or None when nothing is trimmed.
+    if not values or len(values) < min_count:
+        return None
+    sorted_vals = sorted(values)
+    q1 = percentile(sorted_vals, 25)
+    q3 = percentile(sorted_vals, 75)
+    iqr = q3 - q1
+    if iqr <= 0:
+        return None
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+    return bytearray(lower <= v <= upper for v in values)
+
+
+class LineTable:
+    # Per-line (start_ms, end_ms, count) columns in typed arrays instead of one tuple per line.
+    __slots__ = ("starts", "ends", "counts")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.counts = array("q")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, int, int]]) -> "LineTable":
+        table = cls()
+        for start, end, count in rows:
+            table.append(start, end, count)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def append(self, start: int, end: int, count: int) -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.counts.append(count)
+
+    def extend(self, other: "LineTable") -> None:
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+        self.counts.extend(other.counts)
+
+    def rows(self) -> Iterator[Tuple[int, int, int]]:
+        return zip(self.starts, self.ends, self.counts)
+
+    def rates(self) -> array:
+        return array("d", (c / ((e - s) / 1000.0 / 60.0) for s, e, c in self.rows()))
+
+    def durations(self) -> array:
+        return array("d", ((e - s) / 1000.0 for s, e in zip(self.starts, self.ends)))
+
+    def total_count(self, mask: Optional[bytearray] = None) -> int:
+        if mask is None:
+            return sum(self.counts)
+        return sum(c for c, keep in zip(self.counts, mask) if keep)
+
+    def merged_ms(self, mask: Optional[bytearray] = None) -> int:
+        # Same result as summing merge_intervals() over the kept lines, without building it.
+        if mask is None:
+            return merged_duration(self.starts, self.ends)
+        return merged_duration(array("q", compress(self.starts, mask)), array("q", compress(self.ends, mask)))
@@ -0,0 +1,67 @@
+from typing import Callable, Dict, Tuple
+
+DEFAULT_MAXSIZE = 32768
+
+
+# Bounded text -> text memo for the pure normalization steps (strip_nonspoken,
+# _jiten_preprocess). When full, the oldest entry is evicted; subtitles repeat lines
+# mostly within an episode or across a season's OP/ED, so insertion order is a good
+# enough stand-in for recency and costs less than LRU bookkeeping. Only dict operations
+# are used, so concurrent calls from threads are safe; at worst a value is computed twice.
+class TextMemo:
+    def __init__(self, func: Callable[[str], str], maxsize: int = DEFAULT_MAXSIZE):
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: Dict[str, str] = {}
+
+    def __call__(self, text: str) -> str:
+        value = self._cache.get(text)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.func(text)
+        if self.maxsize > 0:
+            if len(self._cache) >= self.maxsize:
+                try:
+                    self._cache.pop(next(iter(self._cache)), None)
+                except (StopIteration, RuntimeError):
+                    pass
+            self._cache[text] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_MEMOS: Dict[str, TextMemo] = {}
+
+
+def text_memo(name: str, func: Callable[[str], str]) -> TextMemo:
+    memo = _MEMOS[name] = TextMemo(func)
+    return memo
+
+
+def set_memo_size(maxsize: int) -> None:
+    # Cap on entries per memo; 0 disables memoization.
+    for memo in _MEMOS.values():
+        memo.maxsize = maxsize
+        while len(memo._cache) > max(maxsize, 0):
+            memo._cache.pop(next(iter(memo._cache)))
+
+
+def clear_memos() -> None:
+    for memo in _MEMOS.values():
+        memo.clear()
+
+
+def memo_stats() -> Dict[str, Tuple[int, int, int]]:
+    # name -> (hits, misses, entries)
+    return {name: (memo.hits, memo.misses, len(memo)) for name, memo in _MEMOS.items()}
@@ -1,8 +1,17 @@
+import heapq
 import re
-from typing import Iterable, List, Tuple
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import pysrt
 
+from .memo import text_memo
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python paths below are the reference.
+    np = None
+
 
 TAG_RE = re.compile(r"\{[^}]*\}|<[^>]*>")
 BRACKET_SEG_RE = re.compile(r"(\([^\)]*\)|（[^）]*）|\[[^\]]*\]|【[^】]*】)")
@@ -101,6 +110,11 @@ def strip_nonspoken(text: str) -> str:
     return "\n".join(cleaned_lines)
 
 
+# strip_nonspoken runs on the same text while merging duplicates and again in the
+# analyzer, and OP/ED lines repeat across episodes; memoize it once for both.
+spoken_text = text_memo("spoken", strip_nonspoken)
+
+
 def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
     intervals = [i for i in intervals if i[1] > i[0]]
     if not intervals:
@@ -116,8 +130,82 @@ def merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int
     return [(s, e) for s, e in merged]
 
 
+def merged_duration(
+    starts: Sequence[int], ends: Sequence[int], groups: Optional[Sequence[int]] = None
+) -> int:
+    # Total length of the union of [start, end) spans, i.e. sum(e - s for s, e in
+    # merge_intervals(...)) without building the merged list. With `groups` (e.g. an
+    # episode index per line) the union is taken per group and summed, so a whole show
+    # can be measured in one call.
+    if np is not None:
+        return _merged_duration_np(starts, ends, groups)
+    order = [i for i in range(len(starts)) if ends[i] > starts[i]]
+    if not order:
+        return 0
+    if groups is None:
+        order.sort(key=starts.__getitem__)
+    else:
+        order.sort(key=lambda i: (groups[i], starts[i]))
+    total = 0
+    first = order[0]
+    cur_group = groups[first] if groups is not None else None
+    cur_start = starts[first]
+    cur_end = ends[first]
+    for i in order:
+        group = groups[i] if groups is not None else None
+        if group == cur_group and starts[i] <= cur_end:
+            if ends[i] > cur_end:
+                cur_end = ends[i]
+        else:
+            total += cur_end - cur_start
+            cur_group = group
+            cur_start = starts[i]
+            cur_end = ends[i]
+    return total + cur_end - cur_start
+
+
+def _as_int64(values) -> "np.ndarray":
+    if isinstance(values, np.ndarray):
+        return values.astype(np.int64, copy=False)
+    if getattr(values, "typecode", None) == "q":
+        # Zero-copy view of array('q') columns; other buffers need a real conversion.
+        return np.frombuffer(values, dtype=np.int64)
+    return np.asarray(values, dtype=np.int64)
+
+
+def _group_offsets(group_ids: "np.ndarray", starts: "np.ndarray", ends: "np.ndarray", gap: int) -> "np.ndarray":
+    # Shift each group onto its own stretch of the time axis so that a single global
+    # cumulative max never carries an end time from one group into the next.
+    lo = min(int(starts.min()), int(ends.min()))
+    hi = max(int(starts.max()), int(ends.max()))
+    return (group_ids - group_ids.min()) * (hi - lo + gap + 1) - lo
+
+
+def _merged_duration_np(starts, ends, groups) -> int:
+    starts = _as_int64(starts)
+    ends = _as_int64(ends)
+    keep = ends > starts
+    if groups is not None:
+        group_ids = _as_int64(groups)[keep]
+    starts = starts[keep]
+    ends = ends[keep]
+    if starts.size == 0:
+        return 0
+    if groups is not None:
+        offsets = _group_offsets(group_ids, starts, ends, 0)
+        starts = starts + offsets
+        ends = ends + offsets
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    run_end = np.maximum.accumulate(ends[order])
+    breaks = np.flatnonzero(starts[1:] > run_end[:-1]) + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks - 1, [starts.size - 1]))
+    return int((run_end[lasts] - starts[firsts]).sum())
+
+
 def _text_length(text: str) -> int:
-    stripped = strip_nonspoken(text)
+    stripped = spoken_text(text)
     return len(stripped.replace("\n", ""))
 
 
@@ -151,13 +239,67 @@ def merge_duplicate_items(
     return merged_items
 
 
+def merge_duplicate_items_np(
+    items: Iterable[Tuple[int, int, str]],
+    max_gap_ms: int = 0,
+    min_length_for_gap: int = 0,
+) -> List[Tuple[int, int, str]]:
+    # Vectorized equivalent of merge_duplicate_items: sort spans by (text, start, end),
+    # find runs with a cumulative-max sweep and reduce each run to (min start, max end).
+    items = list(items)
+    if not items:
+        return []
+    text_ids: dict[str, int] = {}
+    ids = np.fromiter((text_ids.setdefault(t, len(text_ids)) for _, _, t in items), dtype=np.int64, count=len(items))
+    starts = np.fromiter((s for s, _, _ in items), dtype=np.int64, count=len(items))
+    ends = np.fromiter((e for _, e, _ in items), dtype=np.int64, count=len(items))
+    texts = list(text_ids)
+
+    # Only texts that occur more than once can merge, so only those need _text_length.
+    gap_by_id = np.zeros(len(texts), dtype=np.int64)
+    if max_gap_ms:
+        for text_id in np.flatnonzero(np.bincount(ids) > 1):
+            if _text_length(texts[text_id]) >= min_length_for_gap:
+                gap_by_id[text_id] = max_gap_ms
+
+    order = np.lexsort((ends, starts, ids))
+    ids = ids[order]
+    offsets = _group_offsets(ids, starts, ends, max_gap_ms)
+    starts = starts[order] + offsets
+    ends = ends[order] + offsets
+    run_end = np.maximum.accumulate(ends)
+    breaks = np.flatnonzero(starts[1:] > run_end[:-1] + gap_by_id[ids[1:]]) + 1
+    firsts = np.concatenate(([0], breaks))
+    shift = offsets[firsts]
+    out_starts = starts[firsts] - shift
+    # Spans with end < start keep their own end, so take each run's max rather than run_end.
+    out_ends = np.maximum.reduceat(ends, firsts) - shift
+    out_ids = ids[firsts]
+
+    # Final (start, end, text) order, with texts compared through their sorted rank.
+    text_rank = np.empty(len(texts), dtype=np.int64)
+    text_rank[sorted(range(len(texts)), key=texts.__getitem__)] = np.arange(len(texts))
+    final = np.lexsort((text_rank[out_ids], out_ends, out_starts))
+    return [
+        (s, e, texts[t])
+        for s, e, t in zip(out_starts[final].tolist(), out_ends[final].tolist(), out_ids[final].tolist())
+    ]
+
+
+def _merge_duplicates(items, max_gap_ms: int, min_length_for_gap: int):
+    # The NumPy path only pays off once there are enough lines to amortize array setup.
+    if np is not None and len(items) >= 2048:
+        return merge_duplicate_items_np(items, max_gap_ms, min_length_for_gap)
+    return merge_duplicate_items(items, max_gap_ms, min_length_for_gap)
+
+
 def parse_srt(path: str) -> List[Tuple[int, int, str]]:
     subs = pysrt.open(path)
     items = []
     for sub in subs:
         text = clean_text(sub.text or "")
         items.append((sub.start.ordinal, sub.end.ordinal, text))
-    return merge_duplicate_items(items, max_gap_ms=3000, min_length_for_gap=8)
+    return _merge_duplicates(items, max_gap_ms=3000, min_length_for_gap=8)
 
 
 def _parse_ass_time(ts: str) -> int:
@@ -173,44 +315,144 @@ def _parse_ass_time(ts: str) -> int:
     return ((h * 3600 + m * 60 + s) * 1000) + (cs * 10)
 
 
-def parse_ass(path: str) -> List[Tuple[int, int, str]]:
-    items = []
+def iter_ass_events(lines: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
     in_events = False
     event_format = None
     idx_start = idx_end = idx_text = None
 
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        for line in f:
-            stripped = line.strip()
-            if stripped.startswith("[Events]"):
-                in_events = True
-                event_format = None
-                idx_start = idx_end = idx_text = None
-                continue
-            if stripped.startswith("[") and not stripped.startswith("[Events]"):
-                in_events = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[Events]"):
+            in_events = True
+            event_format = None
+            idx_start = idx_end = idx_text = None
+            continue
+        if stripped.startswith("[") and not stripped.startswith("[Events]"):
+            in_events = False
+            continue
+        if not in_events:
+            continue
+
+        if stripped.startswith("Format:"):
+            _, rest = line.split(":", 1)
+            event_format = [f.strip() for f in rest.split(",")]
+            idx_start = event_format.index("Start") if "Start" in event_format else None
+            idx_end = event_format.index("End") if "End" in event_format else None
+            idx_text = event_format.index("Text") if "Text" in event_format else None
+            continue
+
+        if stripped.startswith("Dialogue:"):
+            if event_format is None or idx_start is None or idx_end is None or idx_text is None:
                 continue
-            if not in_events:
+            _, rest = line.split(":", 1)
+            fields = rest.lstrip().split(",", maxsplit=len(event_format) - 1)
+            if len(fields) <= max(idx_start, idx_end, idx_text):
                 continue
+            start = _parse_ass_time(fields[idx_start])
+            end = _parse_ass_time(fields[idx_end])
+            text = clean_text(fields[idx_text])
+            yield (start, end, text)
+
+
+def parse_ass(path: str) -> List[Tuple[int, int, str]]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        items = list(iter_ass_events(f))
+    return _merge_duplicates(items, max_gap_ms=3000, min_length_for_gap=8)
+
+
+def iter_srt_events(lines: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+    for sub in pysrt.stream(lines):
+        yield (sub.start.ordinal, sub.end.ordinal, clean_text(sub.text or ""))
+
+
+def _reorder(items: Iterable[Tuple[int, int, str]], window_ms: int) -> Iterator[Tuple[int, int, str]]:
+    # Subtitle files are only roughly time-ordered (overlapping cues, late duplicates).
+    # Hold events back until the input has moved `window_ms` past them and release them
+    # sorted; disorder within the window is fully repaired.
+    pending: list[Tuple[int, int, str]] = []
+    latest = None
+    for item in items:
+        heapq.heappush(pending, item)
+        if latest is None or item[0] > latest:
+            latest = item[0]
+        while pending[0][0] < latest - window_ms:
+            yield heapq.heappop(pending)
+    while pending:
+        yield heapq.heappop(pending)
 
-            if stripped.startswith("Format:"):
-                _, rest = line.split(":", 1)
-                event_format = [f.strip() for f in rest.split(",")]
-                idx_start = event_format.index("Start") if "Start" in event_format else None
-                idx_end = event_format.index("End") if "End" in event_format else None
-                idx_text = event_format.index("Text") if "Text" in event_format else None
-                continue
 
-            if stripped.startswith("Dialogue:"):
-                if event_format is None or idx_start is None or idx_end is None or idx_text is None:
-                    continue
-                _, rest = line.split(":", 1)
-                fields = rest.lstrip().split(",", maxsplit=len(event_format) - 1)
-                if len(fields) <= max(idx_start, idx_end, idx_text):
-                    continue
-                start = _parse_ass_time(fields[idx_start])
-                end = _parse_ass_time(fields[idx_end])
-                text = clean_text(fields[idx_text])
-                items.append((start, end, text))
-
-    return merge_duplicate_items(items, max_gap_ms=3000, min_length_for_gap=8)
+def merge_duplicate_stream(
+    items: Iterable[Tuple[int, int, str]],
+    max_gap_ms: int = 0,
+    min_length_for_gap: int = 0,
+    max_run_ms: int = 60000,
+) -> Iterator[Tuple[int, int, str]]:
+    # Streaming merge_duplicate_items. Input is re-sorted within a max_gap_ms lookback, and a
+    # run of identical text stays open while a later line could still join it (its end +
+    # max_gap_ms has not been passed), but for at most max_run_ms after it started: output
+    # is sorted, so an open run holds back every run closed after it, and a line repeated
+    # without pause would otherwise keep the whole input in memory. A run closed that way
+    # is emitted and the next identical line starts a new one. Memory is therefore bounded
+    # by the lines inside max_run_ms + max_gap_ms. When no line arrives more than max_gap_ms
+    # out of order and no run lasts longer than max_run_ms, the output equals
+    # merge_duplicate_items, in the same order; otherwise such a run is split in several.
+    open_runs: dict[str, list] = {}  # text -> [start, end, gap or None until needed]
+    closed: list[Tuple[int, int, str]] = []
+
+    for start, end, text in _reorder(items, max_gap_ms):
+        run = open_runs.get(text)
+        if run is not None:
+            if run[2] is None:
+                run[2] = max_gap_ms if _text_length(text) >= min_length_for_gap else 0
+            if start <= run[1] + run[2] and run[0] + max_run_ms >= start:
+                run[1] = max(run[1], end)
+            else:
+                heapq.heappush(closed, (run[0], run[1], text))
+                open_runs[text] = [start, end, run[2]]
+        else:
+            open_runs[text] = [start, end, None]
+
+        expired = [t for t, r in open_runs.items() if r[1] + max_gap_ms < start or r[0] + max_run_ms < start]
+        for t in expired:
+            r = open_runs.pop(t)
+            heapq.heappush(closed, (r[0], r[1], t))
+
+        # Later runs start at or after `start`, so anything sorting before both that and
+        # every still-open run is final.
+        floor = min(((r[0], r[1], t) for t, r in open_runs.items()), default=None)
+        while closed and closed[0][0] < start and (floor is None or closed[0] < floor):
+            yield heapq.heappop(closed)
+
+    for t, r in open_runs.items():
+        heapq.heappush(closed, (r[0], r[1], t))
+    while closed:
+        yield heapq.heappop(closed)
+
+
+def _sniff_format(head: list[str]) -> str:
+    for line in head:
+        stripped = line.strip().lstrip("\ufeff")
+        if not stripped:
+            continue
+        if stripped.startswith("[") or stripped.startswith("Dialogue:"):
+            return "ass"
+        return "srt"
+    return "srt"
+
+
+def stream_subtitles(lines: Iterable[str], fmt: Optional[str] = None) -> Iterator[Tuple[int, int, str]]:
+    # Incremental parse_srt/parse_ass for pipes and very long inputs: events are parsed and
+    # duplicate-merged as lines arrive. The format is sniffed from the first lines if not given.
+    lines = iter(lines)
+    head: list[str] = []
+    if fmt is None:
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                break
+        fmt = _sniff_format(head)
+    if head:
+        head[0] = head[0].lstrip("\ufeff")
+    source = chain(head, lines)
+    events = iter_ass_events(source) if fmt == "ass" else iter_srt_events(source)
+    return merge_duplicate_stream(events, max_gap_ms=3000, min_length_for_gap=8)
@@ -0,0 +1,181 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from .memo import memo_stats
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}"
+
+
+# Live progress for batch runs: files and lines done, lines/s, ETA and the file being
+# worked on, redrawn in place on a terminal (or printed every `interval` seconds when
+# stderr is redirected). Optionally mirrors the same counters, per-stage timings, error
+# and reading-cache counts into a Prometheus text-format file for node-exporter's
+# textfile collector, rewritten atomically at most every `metrics_interval` seconds.
+# All updates are a few additions under a lock; output only happens when due.
+class Progress:
+    def __init__(
+        self,
+        total_files: int,
+        tool: str,
+        show: Optional[bool] = None,
+        metrics_path: Optional[Path] = None,
+        cache=None,
+        stream: TextIO = sys.stderr,
+        interval: Optional[float] = None,
+        metrics_interval: float = 5.0,
+    ):
+        self.total_files = total_files
+        self.tool = tool
+        self.stream = stream
+        tty = stream.isatty()
+        self.show = tty if show is None else show
+        self._redraw = tty
+        self.interval = interval if interval is not None else (0.5 if tty else 10.0)
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.metrics_interval = metrics_interval
+        self.cache = cache
+        self.files = 0
+        self.lines = 0
+        self.errors = 0
+        self.stages: dict[str, float] = {}
+        self.current = ""
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._next_print = self._started
+        self._next_metrics = self._started
+        self._width = 0
+
+    def start_file(self, path) -> None:
+        # With threads this is the file most recently picked up by a worker.
+        self.current = str(path)
+
+    def file_done(self, lines: int, error: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.files += 1
+            self.lines += lines
+            if error:
+                self.errors += 1
+            print_due = self.show and now >= self._next_print
+            if print_due:
+                self._next_print = now + self.interval
+            metrics_due = self.metrics_path is not None and now >= self._next_metrics
+            if metrics_due:
+                self._next_metrics = now + self.metrics_interval
+        if print_due:
+            self._print(now)
+        if metrics_due:
+            self.write_metrics(done=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def _print(self, now: float, final: bool = False) -> None:
+        elapsed = now - self._started
+        rate = self.lines / elapsed if elapsed > 0 else 0.0
+        pct = 100.0 * self.files / self.total_files if self.total_files else 100.0
+        text = f"[{self.files}/{self.total_files} {pct:3.0f}%] {self.lines} lines  {rate:.0f} lines/s"
+        if final:
+            text += f"  done in {_format_eta(elapsed)}"
+            if self.errors:
+                text += f"  {self.errors} errors"
+        else:
+            if 0 < self.files < self.total_files:
+                text += f"  ETA {_format_eta(elapsed / self.files * (self.total_files - self.files))}"
+            if self.current:
+                text += f"  {self.current}"
+        if self._redraw:
+            pad = max(0, self._width - len(text))
+            self._width = len(text)
+            self.stream.write("\r" + text + " " * pad + ("\n" if final else ""))
+        else:
+            self.stream.write(text + "\n")
+        self.stream.flush()
+
+    def render_metrics(self, done: bool) -> str:
+        elapsed = time.monotonic() - self._started
+        label = f'tool="{self.tool}"'
+        metrics = [
+            ("files_total", "counter", "Subtitle files processed.", [("", self.files)]),
+            ("files_expected", "gauge", "Subtitle files in this run.", [("", self.total_files)]),
+            ("lines_total", "counter", "Spoken subtitle lines analyzed.", [("", self.lines)]),
+            ("errors_total", "counter", "Files that failed to parse or analyze.", [("", self.errors)]),
+            ("elapsed_seconds", "gauge", "Wall-clock seconds since the run started.", [("", round(elapsed, 3))]),
+            (
+                "lines_per_second",
+                "gauge",
+                "Average lines analyzed per second.",
+                [("", round(self.lines / elapsed, 3) if elapsed > 0 else 0.0)],
+            ),
+            (
+                "stage_seconds_total",
+                "counter",
+                "Seconds spent per stage, summed over worker threads.",
+                [(f',stage="{name}"', round(seconds, 6)) for name, seconds in sorted(self.stages.items())],
+            ),
+        ]
+        if self.cache is not None:
+            metrics.append(("reading_cache_hits_total", "counter", "Reading cache hits.", [("", self.cache.hits)]))
+            metrics.append(
+                ("reading_cache_misses_total", "counter", "Reading cache misses.", [("", self.cache.misses)])
+            )
+        memos = sorted(memo_stats().items())
+        metrics.append(
+            (
+                "text_memo_hits_total",
+                "counter",
+                "Text normalization memo hits.",
+                [(f',memo="{name}"', hits) for name, (hits, _, _) in memos],
+            )
+        )
+        metrics.append(
+            (
+                "text_memo_misses_total",
+                "counter",
+                "Text normalization memo misses.",
+                [(f',memo="{name}"', misses) for name, (_, misses, _) in memos],
+            )
+        )
+        metrics.append(("done", "gauge", "1 once the run has finished.", [("", int(done))]))
+        metrics.append(("last_update_timestamp_seconds", "gauge", "Unix time of this update.", [("", int(time.time()))]))
+        out = []
+        for name, kind, help_text, samples in metrics:
+            full = f"jsub_rate_{name}"
+            out.append(f"# HELP {full} {help_text}")
+            out.append(f"# TYPE {full} {kind}")
+            for extra, value in samples:
+                out.append(f"{full}{{{label}{extra}}} {value}")
+        return "\n".join(out) + "\n"
+
+    def write_metrics(self, done: bool) -> None:
+        # Write-then-rename so the collector never reads a partial file.
+        if self.metrics_path is None:
+            return
+        with self._lock:
+            text = self.render_metrics(done)
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.metrics_path.with_name(f".{self.metrics_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.metrics_path)
+
+    def close(self) -> None:
+        if self.show:
+            self._print(time.monotonic(), final=True)
+        self.write_metrics(done=True)
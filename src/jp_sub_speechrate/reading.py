@@ -1,9 +1,14 @@
 import re
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Optional
 
 from sudachipy import dictionary
 from sudachipy import tokenizer as sudachi_tokenizer
 
+from .memo import text_memo
+
+if TYPE_CHECKING:
+    from .reading_cache import ReadingCache
+
 
 KANA_RE = re.compile(r"[\u3040-\u309F\u30A0-\u30FF]")
 NON_JP_RE = re.compile(
@@ -41,15 +46,60 @@ def _jiten_preprocess(text: str) -> str:
     return text
 
 
+preprocessed_text = text_memo("preprocess", _jiten_preprocess)
+
+
+SPLIT_MODES = ("A", "B", "C")
+
+
+def load_dictionary(dict_type: str | None = None) -> dictionary.Dictionary:
+    # `dict_type` is "core", "small", "full" (the matching sudachidict_* package must be
+    # installed) or a path to a system .dic file; None uses Sudachi's configured default.
+    if dict_type is None:
+        return dictionary.Dictionary()
+    return dictionary.Dictionary(dict=dict_type)
+
+
 class KanaReader:
-    def __init__(self):
-        self._tokenizer = dictionary.Dictionary().create()
-        self._mode = sudachi_tokenizer.Tokenizer.SplitMode.C
+    # Pass a shared Dictionary to create several readers (e.g. one per thread) while
+    # loading the dictionary only once. A single KanaReader must not be used from
+    # several threads at the same time. With a ReadingCache, to_kana looks a line up there
+    # before tokenizing it; the cache must have been built with the same dictionary and mode.
+    def __init__(
+        self,
+        sudachi_dictionary: dictionary.Dictionary | None = None,
+        dict_type: str | None = None,
+        split_mode: str = "C",
+        cache: Optional["ReadingCache"] = None,
+    ):
+        if split_mode not in SPLIT_MODES:
+            raise ValueError(f"split_mode must be one of {', '.join(SPLIT_MODES)}, got {split_mode!r}")
+        if sudachi_dictionary is None:
+            sudachi_dictionary = load_dictionary(dict_type)
+        self.dictionary = sudachi_dictionary
+        self.split_mode = split_mode
+        self._tokenizer = sudachi_dictionary.create()
+        self._mode = getattr(sudachi_tokenizer.Tokenizer.SplitMode, split_mode)
+        self.cache = cache
+
+    def tokenize(self, text: str):
+        return self._tokenizer.tokenize(preprocessed_text(text), self._mode)
 
     def to_kana(self, text: str, strip_sokuon: bool = True) -> str:
+        # The cache holds the full reading; sokuon is stripped afterwards, which gives the
+        # same result as stripping it token by token.
+        reading = self.cache.get(text) if self.cache is not None else None
+        if reading is None:
+            reading = self._reading(text)
+            if self.cache is not None:
+                self.cache.put(text, reading)
+        if strip_sokuon:
+            reading = SOKUON_RE.sub("", reading)
+        return reading
+
+    def _reading(self, text: str) -> str:
         parts = []
-        text = _jiten_preprocess(text)
-        for token in self._tokenizer.tokenize(text, self._mode):
+        for token in self.tokenize(text):
             pos = token.part_of_speech()
             # Skip whitespace tokens (including full-width space) before counting.
             if pos and pos[0] == "空白":
@@ -59,8 +109,6 @@ class KanaReader:
             reading = token.reading_form()
             if reading == "*":
                 reading = token.surface()
-            if strip_sokuon:
-                reading = SOKUON_RE.sub("", reading)
             parts.append(reading)
         return "".join(parts)
 
@@ -0,0 +1,194 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so the cache is unavailable there.
+    fcntl = None
+
+
+MAGIC = b"JSRCACHE"
+VERSION = 1
+# magic, version, slot count, data start, data end, next free data offset, entries, settings
+_HEADER = struct.Struct("<8sQQQQQQ64s")
+_SLOT = struct.Struct("<QQ")  # key hash (0 = empty), record offset
+_RECORD = struct.Struct("<II")  # key length, value length; followed by the key and value bytes
+MAX_LOAD = 0.75
+
+
+def _dictionary_version(dict_type: Optional[str]) -> str:
+    # Package version for core/small/full (the default dictionary is core); size and
+    # mtime for a .dic path, so a rebuilt dictionary does not reuse old readings.
+    name = dict_type or "core"
+    if name in ("core", "small", "full"):
+        try:
+            return metadata.version(f"sudachidict_{name}")
+        except metadata.PackageNotFoundError:
+            return "unknown"
+    try:
+        st = os.stat(name)
+    except OSError:
+        return "unknown"
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def settings_key(dict_type: Optional[str], split_mode: str) -> str:
+    key = f"{dict_type or 'default'}:{split_mode}@{_dictionary_version(dict_type)}"
+    if len(key.encode("utf-8")) > 64:
+        # The header has room for 64 bytes; long dictionary paths are hashed.
+        key = f"{split_mode}@{hashlib.blake2b(key.encode('utf-8'), digest_size=24).hexdigest()}"
+    return key
+
+
+def _hash(key: bytes) -> int:
+    # Stable across processes (unlike hash()); 0 marks an empty slot.
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+# Text -> kana reading cache in a memory-mapped file, shared by every process (and
+# thread) that opens the same path. The file holds a fixed-size open-addressing table
+# with linear probing plus an append-only area for the key/value bytes. Lookups take
+# no lock: an insert writes the record, then the slot offset, then the slot hash, and
+# readers compare the stored key bytes, so a half-written slot reads as a miss. Inserts
+# are serialized with flock (across processes) and a lock (across threads). Once the
+# table or data area is full, new readings are simply not cached. The file persists,
+# so a later run starts warm.
+class ReadingCache:
+    def __init__(self, path: Path, size_mb: int = 64, settings: str = ""):
+        if fcntl is None:
+            raise RuntimeError("The reading cache needs fcntl, which is not available on this platform")
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        encoded_settings = settings.encode("utf-8")[:64]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    self._create(max(1, size_mb) * 1024 * 1024, encoded_settings)
+                else:
+                    self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            if len(self._mm) < _HEADER.size:
+                raise ValueError(f"Reading cache {self.path} is not a cache file of this version")
+            magic, version, self._slots, self._data_start, self._data_end, _, _, stored = _HEADER.unpack_from(
+                self._mm, 0
+            )
+        except BaseException:
+            os.close(self._fd)
+            raise
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Reading cache {self.path} is not a cache file of this version")
+        stored = stored.rstrip(b"\0")
+        if stored != encoded_settings:
+            self.close()
+            raise ValueError(
+                f"Reading cache {self.path} was built with different settings "
+                f"({stored.decode('utf-8', 'replace')}); use another path"
+            )
+        self._mask = self._slots - 1
+
+    def _create(self, size: int, settings: bytes) -> None:
+        # About an eighth of the file goes to slots, the rest to key/value bytes.
+        slots = 1 << max(4, (size // 128).bit_length() - 1)
+        data_start = _HEADER.size + slots * _SLOT.size
+        size = max(size, data_start + 4096)
+        os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, slots, data_start, size, data_start, 0, settings)
+
+    def _find(self, key: bytes, h: int) -> tuple[int, Optional[str]]:
+        # Probe for `key`; returns (slot position, value) on a hit or (first empty slot, None).
+        mm = self._mm
+        i = h & self._mask
+        for _ in range(self._slots):
+            pos = _HEADER.size + i * _SLOT.size
+            slot_hash, offset = _SLOT.unpack_from(mm, pos)
+            if slot_hash == 0:
+                return pos, None
+            if slot_hash == h and offset:
+                key_len, value_len = _RECORD.unpack_from(mm, offset)
+                start = offset + _RECORD.size
+                if key_len == len(key) and mm[start : start + key_len] == key:
+                    return pos, mm[start + key_len : start + key_len + value_len].decode("utf-8")
+            i = (i + 1) & self._mask
+        return -1, None
+
+    def get(self, text: str) -> Optional[str]:
+        key = text.encode("utf-8")
+        _, value = self._find(key, _hash(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, text: str, reading: str) -> None:
+        key = text.encode("utf-8")
+        value = reading.encode("utf-8")
+        h = _hash(key)
+        record_len = _RECORD.size + len(key) + len(value)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # Re-probe under the lock: another process may have inserted it meanwhile.
+                pos, existing = self._find(key, h)
+                if existing is not None:
+                    return
+                *_, data_used, entries, _ = _HEADER.unpack_from(self._mm, 0)
+                if pos < 0 or entries + 1 > self._slots * MAX_LOAD or data_used + record_len > self._data_end:
+                    self.dropped += 1
+                    return
+                _RECORD.pack_into(self._mm, data_used, len(key), len(value))
+                start = data_used + _RECORD.size
+                self._mm[start : start + len(key)] = key
+                self._mm[start + len(key) : start + record_len - _RECORD.size] = value
+                struct.pack_into("<QQ", self._mm, 40, data_used + record_len, entries + 1)
+                struct.pack_into("<Q", self._mm, pos + 8, data_used)
+                struct.pack_into("<Q", self._mm, pos, h)
+                self.inserts += 1
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def entries(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[6]
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        text = (
+            f"Reading cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+            f"{self.entries()}/{int(self._slots * MAX_LOAD)} entries"
+        )
+        if self.dropped:
+            text += f", {self.dropped} not cached (cache full)"
+        return text
+
+    def close(self) -> None:
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
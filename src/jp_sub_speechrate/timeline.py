@@ -0,0 +1,94 @@
+from itertools import compress
+from typing import Iterator, Optional, Tuple
+
+from .lines import LineTable
+
+
+Window = Tuple[int, int, float, int, float]
+
+
+def rate_timeline(
+    lines: LineTable,
+    window_ms: int,
+    step_ms: Optional[int] = None,
+    mask: Optional[bytearray] = None,
+) -> Iterator[Window]:
+    # Yields (window_start_ms, window_end_ms, units, speech_ms, rate_per_min) for windows
+    # [k * step, k * step + window) covering the episode. Each line's units are spread
+    # evenly over its span; speech time is the union of line spans inside the window, so
+    # overlapping lines are merged the same way merge_intervals does. One sort of the line
+    # boundaries plus a single sweep keeps this O(n log n + windows) instead of rescanning
+    # every line per window.
+    if window_ms <= 0:
+        raise ValueError("window_ms must be positive")
+    step_ms = step_ms or window_ms
+    if step_ms <= 0:
+        raise ValueError("step_ms must be positive")
+
+    starts, ends, counts = lines.starts, lines.ends, lines.counts
+    if mask is not None:
+        starts, ends, counts = (list(compress(col, mask)) for col in (starts, ends, counts))
+
+    events: list[tuple[int, float, int]] = []
+    for start, end, count in zip(starts, ends, counts):
+        if end <= start:
+            continue
+        density = count / (end - start)
+        events.append((start, density, 1))
+        events.append((end, -density, -1))
+    if not events:
+        return
+    events.sort(key=lambda e: e[0])
+
+    # Breakpoints of the piecewise-constant unit density and coverage, with the
+    # cumulative units and covered milliseconds up to each breakpoint.
+    times: list[int] = []
+    densities: list[float] = []
+    covered: list[bool] = []
+    cum_units: list[float] = []
+    cum_speech: list[int] = []
+    density = 0.0
+    active = 0
+    units_acc = 0.0
+    speech_acc = 0
+    i = 0
+    while i < len(events):
+        t = events[i][0]
+        if times:
+            span = t - times[-1]
+            units_acc += densities[-1] * span
+            if covered[-1]:
+                speech_acc += span
+        while i < len(events) and events[i][0] == t:
+            density += events[i][1]
+            active += events[i][2]
+            i += 1
+        if active == 0:
+            density = 0.0
+        times.append(t)
+        densities.append(density)
+        covered.append(active > 0)
+        cum_units.append(units_acc)
+        cum_speech.append(speech_acc)
+
+    def _at(pos: int, t: int) -> tuple[int, float, int]:
+        # Advance the breakpoint cursor to t and return (cursor, units, speech) up to t.
+        while pos + 1 < len(times) and times[pos + 1] <= t:
+            pos += 1
+        if t <= times[0]:
+            return pos, 0.0, 0
+        span = t - times[pos]
+        return pos, cum_units[pos] + densities[pos] * span, cum_speech[pos] + (span if covered[pos] else 0)
+
+    last = times[-1]
+    lo_pos = hi_pos = 0
+    win_start = 0
+    while win_start < last:
+        win_end = win_start + window_ms
+        lo_pos, lo_units, lo_speech = _at(lo_pos, win_start)
+        hi_pos, hi_units, hi_speech = _at(hi_pos, win_end)
+        units = hi_units - lo_units
+        speech_ms = hi_speech - lo_speech
+        rate = units / (speech_ms / 1000.0 / 60.0) if speech_ms > 0 else 0.0
+        yield win_start, win_end, units, speech_ms, rate
+        win_start += step_ms
@@ -0,0 +1,154 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+SUBTITLE_EXTS = (".srt", ".ass")
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_subtitle(path: Path) -> bool:
+    return path.suffix.lower() in SUBTITLE_EXTS
+
+
+class PollingWatcher:
+    # Portable fallback: re-stat the tree every `interval` seconds and report the diff.
+    def __init__(self, root: Path, interval: float = 5.0):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for path in self.root.rglob("*"):
+            if not _is_subtitle(path):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def read(self, timeout: Optional[float] = None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if wait > 0:
+                time.sleep(wait)
+            snapshot = self._scan()
+            previous = self._snapshot
+            changed = {p for p in snapshot.keys() | previous.keys() if snapshot.get(p) != previous.get(p)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    # Linux inotify through libc. Reports changed subtitle files, plus directories that
+    # appeared or disappeared (the caller re-checks everything under those). On queue
+    # overflow the root itself is reported so the caller falls back to a full re-check.
+    def __init__(self, root: Path):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, Path] = {}
+        self._add_tree(root)
+
+    def _add_tree(self, top: Path) -> None:
+        for dirpath, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd < 0:
+                # Typically fs.inotify.max_user_watches; that directory is simply not watched.
+                print(f"Cannot watch {dirpath}: {os.strerror(ctypes.get_errno())}", file=sys.stderr)
+                continue
+            self._dirs[wd] = Path(dirpath)
+
+    def read(self, timeout: Optional[float] = None) -> set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: set[Path] = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset : offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(self.root)
+                    continue
+                parent = self._dirs.get(wd)
+                if parent is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._dirs[wd]
+                    continue
+                path = parent / os.fsdecode(name) if name else parent
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(path)
+                    changed.add(path)
+                elif mask & IN_DELETE_SELF:
+                    changed.add(parent)
+                elif _is_subtitle(path) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(root: Path, poll_interval: float = 5.0, force_polling: bool = False):
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, poll_interval)
+
+
+def debounced_batches(watcher, debounce: float = 2.0, max_latency: float = 10.0) -> Iterator[set[Path]]:
+    # Coalesce bursts: a batch is released once no event arrived for `debounce` seconds,
+    # or `max_latency` seconds after its first event, whichever comes first.
+    while True:
+        batch = watcher.read(None)
+        if not batch:
+            continue
+        first = last = time.monotonic()
+        while True:
+            wait = min(last + debounce, first + max_latency) - time.monotonic()
+            if wait <= 0:
+                break
+            more = watcher.read(wait)
+            if more:
+                batch |= more
+                last = time.monotonic()
+        yield batch
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from jp_sub_speechrate.api import analyze_files
+
+SHOW = Path(__file__).parent / "golden" / "corpus" / "ShowA"
+
+
+@pytest.mark.parametrize(
+    "kwargs,match",
+    [({"on_error": "abrot"}, "on_error"), ({"unit": "beats"}, "unit"), ({"reader": object(), "threads": 2}, "threads")],
+)
+def test_arguments_are_validated_on_call(kwargs, match):
+    # No next(): the error must surface when analyze_files is called.
+    with pytest.raises(ValueError, match=match):
+        analyze_files([SHOW / "ep01.srt"], **kwargs)
+
+
+def test_on_error_skip_reports_the_failure(tmp_path):
+    bad = tmp_path / "bad.ass"
+    bad.write_text(
+        "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        "Dialogue: 0,0:00:0a.00,0:00:03.00,Default,,0,0,0,,はい\n",
+        encoding="utf-8",
+    )
+    good = SHOW / "ep01.srt"
+    results = list(analyze_files([bad, good], on_error="skip"))
+    assert [r.path for r in results] == [str(bad), str(good)]
+    assert results[0].error is not None
+    assert results[1].error is None and results[1].units > 0
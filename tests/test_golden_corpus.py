@@ -0,0 +1,41 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent / "golden"
+SCRIPT = Path(__file__).parents[1] / "scripts" / "golden_corpus.py"
+
+
+def _golden_corpus():
+    spec = importlib.util.spec_from_file_location("golden_corpus", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _diff(argv: list[str], capsys) -> str:
+    try:
+        _golden_corpus().main(
+            ["diff", "--root", str(ROOT / "corpus"), "--snapshot", str(ROOT / "snapshot.jsonl.gz"), *argv]
+        )
+    except SystemExit as exc:
+        pytest.fail(f"golden diff failed ({exc.code}):\n{capsys.readouterr().out}")
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize("impl", ["default", "stream"])
+@pytest.mark.parametrize("threads", [1, 2])
+def test_matches_snapshot(impl, threads, capsys):
+    out = _diff(["--impl", impl, "--threads", str(threads)], capsys)
+    assert "IDENTICAL: 4 files" in out
+
+
+@pytest.mark.parametrize("impl", ["default", "stream"])
+def test_matches_snapshot_with_reading_cache(impl, tmp_path, capsys):
+    pytest.importorskip("fcntl")
+    cache = tmp_path / "readings.cache"
+    # The first run fills the cache, the second one is served from it.
+    for _ in range(2):
+        out = _diff(["--impl", impl, "--threads", "2", "--reading-cache", str(cache)], capsys)
+        assert "IDENTICAL: 4 files" in out
@@ -0,0 +1,68 @@
+import random
+from array import array
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from jp_sub_speechrate import parsing  # noqa: E402
+from jp_sub_speechrate.parsing import (  # noqa: E402
+    merge_duplicate_items,
+    merge_duplicate_items_np,
+    merge_intervals,
+    merged_duration,
+)
+
+TEXTS = ["あ", "はい", "そうですね", "今日はいい天気ですね", "（ナレーション）行くぞ", "{\\an8}看板"]
+
+
+def _spans(rng: random.Random, n: int) -> tuple[list[int], list[int]]:
+    starts = [rng.randint(-2000, 60000) for _ in range(n)]
+    # Includes empty and reversed spans, which are ignored.
+    ends = [s + rng.randint(-500, 5000) for s in starts]
+    return starts, ends
+
+
+def _reference_duration(starts, ends, groups=None) -> int:
+    by_group: dict = {}
+    for i in range(len(starts)):
+        by_group.setdefault(groups[i] if groups is not None else None, []).append((starts[i], ends[i]))
+    return sum(e - s for spans in by_group.values() for s, e in merge_intervals(spans))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_merged_duration_matches_merge_intervals(seed, monkeypatch):
+    rng = random.Random(seed)
+    starts, ends = _spans(rng, rng.randint(0, 300))
+    expected = _reference_duration(starts, ends)
+    assert merged_duration(starts, ends) == expected
+    assert merged_duration(array("q", starts), array("q", ends)) == expected
+    assert merged_duration(array("i", starts), array("i", ends)) == expected
+    assert merged_duration(array("d", starts), array("d", ends)) == expected
+    monkeypatch.setattr(parsing, "np", None)
+    assert merged_duration(starts, ends) == expected
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_merged_duration_groups_matches_merge_intervals(seed, monkeypatch):
+    rng = random.Random(seed)
+    starts, ends = _spans(rng, rng.randint(0, 300))
+    groups = [rng.randint(-3, 6) for _ in starts]
+    expected = _reference_duration(starts, ends, groups)
+    assert merged_duration(starts, ends, groups) == expected
+    assert merged_duration(array("q", starts), array("q", ends), array("q", groups)) == expected
+    assert merged_duration(array("i", starts), array("i", ends), array("i", groups)) == expected
+    monkeypatch.setattr(parsing, "np", None)
+    assert merged_duration(starts, ends, groups) == expected
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("max_gap_ms,min_length_for_gap", [(0, 0), (3000, 0), (3000, 8)])
+def test_merge_duplicate_items_np_matches_merge_duplicate_items(seed, max_gap_ms, min_length_for_gap):
+    rng = random.Random(seed)
+    items = []
+    for _ in range(rng.randint(0, 300)):
+        start = rng.randint(0, 120000)
+        items.append((start, start + rng.randint(0, 4000), rng.choice(TEXTS)))
+    expected = merge_duplicate_items(items, max_gap_ms, min_length_for_gap)
+    assert merge_duplicate_items_np(items, max_gap_ms, min_length_for_gap) == expected
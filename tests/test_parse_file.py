@@ -0,0 +1,27 @@
+from jp_sub_speechrate.api import analyze_files, parse_file
+from jp_sub_speechrate.parsing import parse_ass
+
+SSA = """[Script Info]
+ScriptType: v4.00
+
+[Events]
+Format: Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: Marked=0,0:00:01.00,0:00:03.00,Default,,0,0,0,,今日はいい天気ですね
+Dialogue: Marked=0,0:00:04.00,0:00:06.50,Default,,0,0,0,,東京に行きたいです
+"""
+
+
+def test_ssa_is_parsed_as_ass(tmp_path):
+    path = tmp_path / "ep3.ssa"
+    path.write_text(SSA, encoding="utf-8")
+    items = list(parse_file(path))
+    assert items == parse_ass(str(path))
+    assert [text.strip() for _, _, text in items] == ["今日はいい天気ですね", "東京に行きたいです"]
+
+
+def test_ssa_is_analyzed(tmp_path):
+    path = tmp_path / "ep3.ssa"
+    path.write_text(SSA, encoding="utf-8")
+    (result,) = analyze_files([path], on_error="abort")
+    assert result.error is None
+    assert result.units > 0
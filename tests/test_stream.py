@@ -0,0 +1,79 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from jp_sub_speechrate.api import line_table, summarize
+from jp_sub_speechrate.parsing import (
+    merge_duplicate_items,
+    merge_duplicate_stream,
+    parse_ass,
+    parse_srt,
+    stream_subtitles,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TEXTS = ["うん", "はい", "そうですね", "今日はいい天気ですね", "（柚子）ちょっと待って！", "東京に行きたいです"]
+
+
+def _stream(path: Path, fmt=None) -> list:
+    # Read without utf-8-sig so a BOM reaches the streaming parser as it would from a pipe.
+    with path.open("r", encoding="utf-8") as f:
+        return list(stream_subtitles(f, fmt))
+
+
+@pytest.mark.parametrize(
+    "name,parse,fmt",
+    [
+        ("stream.srt", parse_srt, None),
+        ("stream.srt", parse_srt, "srt"),
+        ("stream_bom.srt", parse_srt, None),
+        ("stream.ass", parse_ass, None),
+    ],
+)
+def test_stream_matches_batch_parser(name, parse, fmt):
+    path = FIXTURES / name
+    expected = parse(str(path))
+    assert expected
+    assert _stream(path, fmt) == expected
+
+
+def _disordered(rng: random.Random, n: int) -> list:
+    items = []
+    for _ in range(n):
+        start = rng.randint(0, 600000)
+        items.append((start, start + rng.randint(0, 4000), rng.choice(TEXTS)))
+    # Delay each line by up to 3000 ms, so none arrives more than 3000 ms out of order.
+    return [item for _, item in sorted((item[0] + rng.randint(0, 3000), item) for item in items)]
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("min_length_for_gap", [0, 8])
+def test_merge_duplicate_stream_repairs_bounded_disorder(seed, min_length_for_gap):
+    rng = random.Random(seed)
+    items = _disordered(rng, rng.randint(0, 300))
+    expected = merge_duplicate_items(items, 3000, min_length_for_gap)
+    assert list(merge_duplicate_stream(items, 3000, min_length_for_gap)) == expected
+
+
+def test_long_repeated_line_is_split_and_counted_per_piece():
+    # 200 back-to-back repeats over 200 s: the batch parser merges them into one line,
+    # the stream closes the run every 60 s and yields overlapping pieces.
+    items = [(i * 1000, i * 1000 + 1500, "ずっと一緒だよ") for i in range(200)]
+    batch = merge_duplicate_items(items, 3000, 0)
+    stream = list(merge_duplicate_stream(items, 3000, 0))
+    assert batch == [(0, 200500, "ずっと一緒だよ")]
+    assert [start for start, _, _ in stream] == [0, 61000, 122000, 183000]
+    assert all(end - start <= 60000 + 1500 for start, end, _ in stream)
+    assert min(s for s, _, _ in stream) == 0 and max(e for _, e, _ in stream) == 200500
+
+    batch_units, batch_minutes = summarize(line_table(batch), trim_outliers=False)
+    stream_units, stream_minutes = summarize(line_table(stream), trim_outliers=False)
+    # The pieces overlap, so the merged duration is unchanged, but each piece is counted.
+    assert stream_minutes == batch_minutes
+    assert stream_units == len(stream) * batch_units
+
+
+def test_max_run_ms_can_be_lifted():
+    items = [(i * 1000, i * 1000 + 1500, "ずっと一緒だよ") for i in range(200)]
+    assert list(merge_duplicate_stream(items, 3000, 0, max_run_ms=10**9)) == merge_duplicate_items(items, 3000, 0)